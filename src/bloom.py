@@ -0,0 +1,70 @@
+import hashlib
+import math
+
+# from_dict() takes filters straight from UDP peers; these caps keep a crafted
+# filter from costing more than an honest one. The constructor never picks
+# more than a handful of hashes, and a filter must fit in one datagram.
+MAX_HASHES = 16
+MAX_BYTES = 64 * 1024
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set membership. False positives are possible
+    (at roughly error_rate once `capacity` items are added), false negatives
+    are not. Used by gossip to describe which event ids a node holds in a
+    few bytes per event instead of shipping the ids themselves.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.size = max(
+            int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))), 8
+        )
+        self.num_hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.num_hashes))
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item)
+        )
+
+    def to_dict(self):
+        return {"m": self.size, "k": self.num_hashes, "bits": bytes(self.bits)}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a filter from to_dict() output. Raises ValueError if the
+        fields are missing, mistyped, or describe an implausible filter."""
+        try:
+            size = int(data["m"])
+            num_hashes = int(data["k"])
+            raw = data["bits"]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"malformed bloom filter: {e}") from e
+        # bytearray(n) would zero-fill n bytes for an int, so only byte
+        # buffers are accepted, and their size is checked before copying
+        if not isinstance(raw, (bytes, bytearray, memoryview)):
+            raise ValueError(f"bloom filter bits must be bytes, not {type(raw)}")
+        if not 1 <= num_hashes <= MAX_HASHES:
+            raise ValueError(f"bloom filter hash count out of range: {num_hashes}")
+        if len(raw) > MAX_BYTES:
+            raise ValueError(f"bloom filter too large: {len(raw)} bytes")
+        if size < 1 or (size + 7) // 8 != len(raw):
+            raise ValueError("bloom filter size does not match its bits")
+        bloom = cls.__new__(cls)
+        bloom.size = size
+        bloom.num_hashes = num_hashes
+        bloom.bits = bytearray(raw)
+        return bloom
@@ -9,9 +9,16 @@ class Config:
         self.http_port = int(os.getenv("HTTP_PORT", "8000"))
         self.gossip_port = int(os.getenv("GOSSIP_PORT", "9000"))
         self.gossip_interval = float(os.getenv("GOSSIP_INTERVAL", "5"))
+        # kernel receive buffer for the gossip socket; bursts from peers that
+        # tick together queue here while the event loop is busy merging
+        self.gossip_recv_buffer = max(
+            int(os.getenv("GOSSIP_RECV_BUFFER", str(4 * 1024 * 1024))), 0
+        )
         self.gateway_poll_interval = float(os.getenv("GATEWAY_POLL_INTERVAL", "10"))
         self.data_dir = os.getenv("DATA_DIR", "/data")
         self.log_level = os.getenv("LOG_LEVEL", "INFO")
+        # "sha256" (default, what outside log verifiers expect) or "blake2b"
+        self.hash_chain_algorithm = os.getenv("HASH_CHAIN_ALGORITHM", "sha256")
 
         self.gateway_http_retries = max(int(os.getenv("GATEWAY_HTTP_RETRIES", "2")), 1)
         self.gateway_http_retry_backoff_ms = max(
@@ -20,8 +20,13 @@ class GCounter:
         self.counts[self.node_id] = self.counts.get(self.node_id, 0) + amount
 
     def merge(self, other):
+        counts = self.counts
         for node_id, count in other.counts.items():
-            self.counts[node_id] = max(self.counts.get(node_id, 0), count)
+            # write only when the other side is ahead (or the key is new, so
+            # zero entries still show up in the leaf hash like before)
+            current = counts.get(node_id)
+            if current is None or count > current:
+                counts[node_id] = count
 
     def to_dict(self):
         return {
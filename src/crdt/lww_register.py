@@ -1,4 +1,23 @@
-from datetime import datetime
+import time
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_ns(ts):
+    """Naive-UTC (or aware) datetime -> integer epoch nanoseconds."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return (ts - _EPOCH) // _MICROSECOND * 1000
+
+
+def _now_ns():
+    # microsecond granularity, so the ISO form round-trips exactly
+    return time.time_ns() // 1000 * 1000
+
+
+_MIN_NS = _to_ns(datetime.min)
 
 
 class LWWRegister:
@@ -8,46 +27,56 @@ class LWWRegister:
 
     Disaster use-case: latest sensor reading at a location
     (e.g., "water level at bridge_north is 4.1 meters").
+
+    Timestamps are kept as integer epoch nanoseconds, so set/merge compare
+    plain ints; they become ISO strings only at the serialization boundary.
     """
 
     def __init__(self, node_id, description=""):
         self.node_id = node_id
         self.description = description
         self._value = None
-        self._timestamp = datetime.min
+        self._ts_ns = _MIN_NS
         self._writer_id = node_id
+        # (ts_ns, iso string) of the last formatted timestamp; the leaf hash
+        # and to_dict() both need it, usually many times per write
+        self._iso = (None, None)
 
     @property
     def value(self):
         return self._value
 
     def set(self, value, timestamp=None):
-        ts = timestamp or datetime.utcnow()
+        ts = _to_ns(timestamp) if timestamp else _now_ns()
         # only update if this write is newer (or same time but higher node id)
-        if ts > self._timestamp or (
-            ts == self._timestamp and self.node_id >= self._writer_id
-        ):
+        if ts > self._ts_ns or (ts == self._ts_ns and self.node_id >= self._writer_id):
             self._value = value
-            self._timestamp = ts
+            self._ts_ns = ts
             self._writer_id = self.node_id
 
     def merge(self, other):
-        if other._timestamp > self._timestamp:
-            self._value = other._value
-            self._timestamp = other._timestamp
-            self._writer_id = other._writer_id
-        elif other._timestamp == self._timestamp and other._writer_id > self._writer_id:
+        if other._ts_ns > self._ts_ns or (
+            other._ts_ns == self._ts_ns and other._writer_id > self._writer_id
+        ):
             self._value = other._value
-            self._timestamp = other._timestamp
+            self._ts_ns = other._ts_ns
             self._writer_id = other._writer_id
 
+    def _iso_timestamp(self):
+        """Naive-UTC ISO form, identical to datetime.isoformat()."""
+        ts_ns, iso = self._iso
+        if ts_ns != self._ts_ns:
+            iso = (_EPOCH + timedelta(microseconds=self._ts_ns // 1000)).isoformat()
+            self._iso = (self._ts_ns, iso)
+        return iso
+
     def to_dict(self):
         return {
             "type": "lww_register",
             "node_id": self.node_id,
             "description": self.description,
             "value": self._value,
-            "timestamp": self._timestamp.isoformat(),
+            "timestamp": self._iso_timestamp(),
             "writer_id": self._writer_id,
         }
 
@@ -55,6 +84,6 @@ class LWWRegister:
     def from_dict(cls, data):
         r = cls(data["node_id"], description=data.get("description", ""))
         r._value = data["value"]
-        r._timestamp = datetime.fromisoformat(data["timestamp"])
+        r._ts_ns = _to_ns(datetime.fromisoformat(data["timestamp"]))
         r._writer_id = data["writer_id"]
         return r
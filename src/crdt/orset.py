@@ -5,12 +5,15 @@ Used for sets where elements can be added and removed concurrently.
 Add wins over concurrent remove — the safe default for disaster response
 (better to over-report a hazard than to silently drop one).
 
-Each add operation generates a globally unique tag. Remove only removes
-tags that the removing node has *observed*. Concurrent adds from other
-nodes survive a remove because their tags haven't been observed yet.
+This is the optimized OR-Set (Bieniusa et al.): each add is tagged with a
+dot (replica, counter), and a version vector records the highest counter
+seen from every replica. Remove simply drops the element's dots — no
+tombstones. On merge, a dot only one side has survives unless the other
+side's version vector already covers it (it saw that add, then removed
+it). Concurrent adds carry dots the remover never saw, so they survive.
 """
 
-import uuid
+import time
 
 
 class ORSet:
@@ -22,65 +25,100 @@ class ORSet:
       - remove("highway_101") → highway_101 is cleared
       - concurrent add + remove → add wins (road stays reported as blocked)
 
-    Internally: elements maps element -> set of unique tags.
+    Internally: elements maps element -> {replica: latest add counter}, and
+    the version vector maps replica -> highest counter observed.
     """
 
     def __init__(self, node_id, description=""):
         self.node_id = node_id
         self.description = description
-        # element -> { tag1, tag2, ... }
-        # an element is "in the set" if it has at least one tag
+        # element -> {replica: counter}; an element is "in the set" while it
+        # has at least one dot, so empty entries are never kept
         self._elements = {}
+        self._vv = {}  # replica -> highest counter seen
+        self._value = None  # frozenset of elements, built on first read
 
     @property
     def value(self):
-        """Return the set of elements currently in the set."""
-        return {elem for elem, tags in self._elements.items() if tags}
+        """Return the (read-only) set of elements currently in the set."""
+        if self._value is None:
+            self._value = frozenset(self._elements)
+        return self._value
+
+    def _next_counter(self):
+        # seeded from the clock so a node restarted with the same id and an
+        # empty state does not reuse counters its peers already cover
+        counter = max(self._vv.get(self.node_id, 0) + 1, time.time_ns() // 1000)
+        self._vv[self.node_id] = counter
+        return counter
 
     def add(self, element):
-        """Add an element. Generates a unique tag for this add operation."""
-        tag = f"{self.node_id}:{uuid.uuid4().hex[:12]}"
-        if element not in self._elements:
-            self._elements[element] = set()
-        self._elements[element].add(tag)
+        """Add an element. Tags it with a fresh dot from this replica."""
+        dots = self._elements.get(element)
+        if dots is None:
+            dots = self._elements[element] = {}
+        # a newer dot from the same replica supersedes the older one
+        dots[self.node_id] = self._next_counter()
+        self._value = None
 
     def remove(self, element):
-        """Remove an element by clearing all *observed* tags.
+        """Remove an element by dropping all *observed* dots.
 
-        If another node concurrently adds the same element, their tag
-        won't be in our observed set, so the element survives (add-wins).
+        If another node concurrently adds the same element, their dot
+        isn't covered by our version vector, so the element survives
+        (add-wins).
         """
-        if element in self._elements:
-            self._elements[element] = set()
+        if self._elements.pop(element, None) is not None:
+            self._value = None
 
     def lookup(self, element):
         """Check if an element is in the set."""
-        return bool(self._elements.get(element))
+        return element in self._elements
 
     def merge(self, other):
-        """Merge another OR-Set. Union of all tags per element."""
-        for elem, tags in other._elements.items():
-            if elem not in self._elements:
-                self._elements[elem] = set()
-            self._elements[elem] = self._elements[elem].union(tags)
+        """Merge another OR-Set, dropping dots one side has seen removed."""
+        mine, theirs = self._elements, other._elements
+        my_vv, their_vv = self._vv, other._vv
+        for elem in mine.keys() | theirs.keys():
+            a = mine.get(elem, {})
+            b = theirs.get(elem, {})
+            # new dict every time, so later adds on either side stay independent
+            dots = {}
+            for replica in a.keys() | b.keys():
+                ca = a.get(replica)
+                cb = b.get(replica)
+                kept = 0
+                if ca is not None and (ca == cb or ca > their_vv.get(replica, 0)):
+                    kept = ca
+                if cb is not None and (cb == ca or cb > my_vv.get(replica, 0)):
+                    kept = max(kept, cb)
+                if kept:
+                    dots[replica] = kept
+            if dots:
+                mine[elem] = dots
+            else:
+                mine.pop(elem, None)
+
+        for replica, counter in their_vv.items():
+            if counter > my_vv.get(replica, 0):
+                my_vv[replica] = counter
+        self._value = None
 
     def to_dict(self):
         return {
             "type": "or_set",
             "node_id": self.node_id,
             "description": self.description,
-            "elements": {
-                elem: sorted(tags)
-                for elem, tags in self._elements.items()
-                if tags  # only include elements that are actually present
-            },
-            "active_elements": sorted(self.value),
+            "elements": {elem: dict(dots) for elem, dots in self._elements.items()},
+            "version_vector": dict(self._vv),
+            "active_elements": sorted(self._elements),
         }
 
     @classmethod
     def from_dict(cls, data):
         s = cls(data["node_id"], description=data.get("description", ""))
         s._elements = {
-            elem: set(tags) for elem, tags in data.get("elements", {}).items()
+            elem: dict(dots) for elem, dots in data.get("elements", {}).items() if dots
         }
+        s._vv = dict(data.get("version_vector", {}))
         return s
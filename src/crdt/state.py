@@ -10,15 +10,56 @@ Wraps four CRDT types, each serving a specific disaster-response role:
 Events are routed to the correct CRDT based on their category.
 """
 
+import functools
 import hashlib
-import json
+import sys
+import time
 from datetime import datetime
 
+import orjson
+
 from .gcounter import GCounter
 from .lww_register import LWWRegister
 from .pncounter import PNCounter
 from .orset import ORSet
 
+# leaf key prefixes for the four CRDT subtrees, in merkle order
+SUBTREE_PREFIXES = ("c:", "r:", "pn:", "s:")
+
+
+def _digest(data):
+    # 32-byte blake2b: faster than sha256 in software and the same width, so
+    # roots still fit the gossip digest frame
+    return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+
+@functools.lru_cache(maxsize=4096, typed=True)
+def _interned_key(*parts):
+    return sys.intern(":".join(map(str, parts)))
+
+
+def _crdt_key(*parts):
+    """CRDT/leaf key like "sensor:bridge_north:water_level".
+
+    The same few (prefix, location, event_type) combinations come up on
+    every event, so the joined key is cached and interned instead of being
+    formatted and hashed afresh each time.
+    """
+    try:
+        return _interned_key(*parts)
+    except TypeError:  # unhashable part, e.g. a dict location from metadata
+        return ":".join(map(str, parts))
+
+
+# canonical leaf encoding: sorted keys, and non-string keys (e.g. ints inside a
+# register value) stringified the way json.dumps did
+_LEAF_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+
+def _leaf_digest(leaf_key, payload):
+    encoded = orjson.dumps(payload, option=_LEAF_OPTIONS)
+    return _digest(leaf_key.encode() + b":" + encoded)
+
 
 class NodeState:
     """
@@ -40,6 +81,30 @@ class NodeState:
         self.pn_counters = {}  # key -> PNCounter
         self.sets = {}  # key -> ORSet
         self.event_ids = []
+        # number of "sensor:" registers, kept up to date as keys are created
+        # so summary() does not scan every register
+        self._sensor_readings = 0
+        # bumped on every mutation, including merges that leave the root alone
+        self.revision = 0
+        # derived views (leaf hashes, root, to_dict, summary), reset on mutation
+        self._derived = {}
+        # per-leaf hashes outlive _derived: a mutation only marks the leaves it
+        # touched as stale (None = all of them), and only those are rehashed
+        self._leaf_digests = {}
+        self._stale_leaves = set()
+        # (leaf keys, tree levels) behind the last merkle_root(); while the key
+        # list is unchanged only the paths above changed leaves are rehashed
+        self._merkle_tree = None
+
+        # delta-state bookkeeping: every local write bumps our logical clock
+        # and tags the touched leaves/event with it (a "dot"), so peers can ask
+        # for just the writes their version vector has not seen yet
+        self.dots = {}  # leaf key -> {origin node_id: counter}
+        self.event_dots = {}  # event_id -> [origin node_id, counter]
+        self._version_vector = {}  # origin node_id -> highest counter seen
+        # set on states decoded from a delta_for_events() payload: they hold
+        # some writes past a gap, so merging one must not advance our vector
+        self.partial = False
 
     def record_event(
         self, event_id, event_type, data, category="general", operation=None
@@ -48,8 +113,34 @@ class NodeState:
 
         Returns a dict describing where the data was stored.
         """
-        stored_in = {}
+        stored_in = self._apply_event(event_id, event_type, data, category, operation)
+        self.version += 1
+        self.updated_at = datetime.utcnow()
+        self._invalidate(self._event_leaves(stored_in))
+        return stored_in
+
+    def record_events(self, events):
+        """Record a batch of events in one go.
+
+        Each event is an (event_id, event_type, data, category, operation)
+        tuple; category and operation may be left off. Events apply in order,
+        exactly as repeated record_event() calls would, but the version,
+        timestamp and cached views are updated once for the whole batch.
+        Returns the stored_in dicts in the same order.
+        """
+        results = [self._apply_event(*event) for event in events]
+        if results:
+            self.version += len(results)
+            self.updated_at = datetime.utcnow()
+            self._invalidate(
+                leaf for stored_in in results for leaf in self._event_leaves(stored_in)
+            )
+        return results
 
+    def _apply_event(
+        self, event_id, event_type, data, category="general", operation=None
+    ):
+        """Route one event into the CRDTs; the caller bumps version/caches."""
         if category == "sensor":
             stored_in = self._record_sensor(event_id, event_type, data)
         elif category == "resource":
@@ -65,10 +156,125 @@ class NodeState:
         if event_id not in self.event_ids:
             self.event_ids.append(event_id)
 
-        self.version += 1
-        self.updated_at = datetime.utcnow()
+        self._stamp(event_id, stored_in)
         return stored_in
 
+    def _invalidate(self, leaf_keys=None):
+        """Drop cached derived views after a mutation.
+
+        leaf_keys names the merkle leaves the mutation touched; only those are
+        rehashed on the next read. None means any leaf may have changed.
+        """
+        self.revision += 1
+        self._derived = {}
+        if leaf_keys is None:
+            self._stale_leaves = None
+        elif self._stale_leaves is not None:
+            self._stale_leaves.update(leaf_keys)
+
+    @staticmethod
+    def _event_leaves(stored_in):
+        """Leaf keys of the CRDT entries named in a record_event() result."""
+        for field, tag in (
+            ("counter_key", "c"),
+            ("register_key", "r"),
+            ("pn_counter_key", "pn"),
+            ("set_key", "s"),
+        ):
+            key = stored_in.get(field)
+            if key:
+                yield _crdt_key(tag, key)
+
+    def _stamp(self, event_id, stored_in):
+        """Advance our logical clock and tag the leaves this event touched."""
+        # seeded from the clock, as ORSet._next_counter is: a node restarted
+        # with the same id and an empty state must not reuse counters that
+        # peers' version vectors already cover, or delta_since() on their
+        # side would filter its new writes out
+        vv = self._version_vector
+        counter = max(vv.get(self.node_id, 0) + 1, time.time_ns() // 1000)
+        vv[self.node_id] = counter
+        for leaf in self._event_leaves(stored_in):
+            self.dots.setdefault(leaf, {})[self.node_id] = counter
+        self.event_dots.setdefault(event_id, [self.node_id, counter])
+
+    def _absorb_dots(self, dots, event_dots, advance=True):
+        """Fold another state's dots into ours, advancing the version vector.
+
+        With advance=False the dots are recorded but the vector is left
+        alone, for payloads that may skip writes older than their dots.
+        """
+        # a throwaway dict takes the updates when the vector must not move
+        vv = self._version_vector if advance else {}
+        for leaf_key, origins in dots.items():
+            mine = self.dots.setdefault(leaf_key, {})
+            for origin, counter in origins.items():
+                if counter > mine.get(origin, 0):
+                    mine[origin] = counter
+                if counter > vv.get(origin, 0):
+                    vv[origin] = counter
+        for event_id, (origin, counter) in event_dots.items():
+            if event_id not in self.event_dots:
+                self.event_dots[event_id] = [origin, counter]
+            if counter > vv.get(origin, 0):
+                vv[origin] = counter
+
+    def version_vector(self):
+        """Highest logical clock seen from each origin node."""
+        return dict(self._version_vector)
+
+    def delta_since(self, version_vector):
+        """Entries written after version_vector, in to_dict() shape.
+
+        Only leaves carrying a dot newer than the vector are included, so a
+        peer that is nearly caught up receives a handful of entries instead
+        of the full state. The result merges like any other state dict.
+        """
+
+        def is_newer(origin, counter):
+            return counter > version_vector.get(origin, 0)
+
+        leaf_keys = [
+            leaf_key
+            for leaf_key, origins in self.dots.items()
+            if any(is_newer(o, c) for o, c in origins.items())
+        ]
+        data = self.leaves_dict(leaf_keys)
+        data["event_dots"] = {
+            event_id: list(dot)
+            for event_id, dot in self.event_dots.items()
+            if is_newer(*dot)
+        }
+        data["event_ids"] = list(data["event_dots"])
+        return data
+
+    def delta_for_events(self, event_ids):
+        """Delta that covers at least the given events, in to_dict() shape.
+
+        Winds our version vector back to just before each listed event on its
+        origin, which is the vector a peer missing exactly those events would
+        hold, and returns delta_since() of that. Events without a dot are
+        skipped since they cannot be located.
+
+        The result is marked partial: it can leave out older writes from the
+        same origins, so a receiver merges it without advancing its version
+        vector and still gets those writes from a later delta_since().
+        """
+        vv = self.version_vector()
+        for event_id in event_ids:
+            dot = self.event_dots.get(event_id)
+            if dot is None:
+                continue
+            origin, counter = dot
+            vv[origin] = min(vv.get(origin, 0), counter - 1)
+        data = self.delta_since(vv)
+        data["partial"] = True
+        return data
+
+    def merge_delta(self, delta):
+        """Merge a delta_since() payload from another node. Returns the new root."""
+        return self.merge(NodeState.from_dict(delta))
+
     def _record_sensor(self, event_id, event_type, data):
         """Sensor data: count the event, store latest reading in register.
 
@@ -76,7 +282,7 @@ class NodeState:
         This prevents cross-type clobbering at the same location.
         """
         # count this event type
-        counter_key = f"event_count:{event_type}"
+        counter_key = _crdt_key("event_count", event_type)
         if counter_key not in self.counters:
             self.counters[counter_key] = GCounter(
                 self.node_id, description=f"Number of {event_type} readings recorded"
@@ -85,11 +291,12 @@ class NodeState:
 
         # store latest reading
         location = data.get("location", "unknown")
-        register_key = f"sensor:{location}:{event_type}"
+        register_key = _crdt_key("sensor", location, event_type)
         if register_key not in self.registers:
             self.registers[register_key] = LWWRegister(
                 self.node_id, description=f"Latest {event_type} reading at {location}"
             )
+            self._sensor_readings += 1
         self.registers[register_key].set(
             {
                 "value": data.get("value"),
@@ -113,7 +320,7 @@ class NodeState:
         Counter key: resource:<location>:<event_type>
         """
         location = data.get("location", "unknown")
-        counter_key = f"resource:{location}:{event_type}"
+        counter_key = _crdt_key("resource", location, event_type)
         if counter_key not in self.pn_counters:
             self.pn_counters[counter_key] = PNCounter(
                 self.node_id, description=f"Net {event_type} at {location}"
@@ -127,7 +334,7 @@ class NodeState:
                 self.pn_counters[counter_key].increment(int(value))
 
         # also count the event
-        event_counter_key = f"event_count:{event_type}"
+        event_counter_key = _crdt_key("event_count", event_type)
         if event_counter_key not in self.counters:
             self.counters[event_counter_key] = GCounter(
                 self.node_id, description=f"Number of {event_type} reports recorded"
@@ -147,7 +354,7 @@ class NodeState:
         Set key: hazards:<event_type>
         Element: the location or value representing the hazard
         """
-        set_key = f"hazards:{event_type}"
+        set_key = _crdt_key("hazards", event_type)
         if set_key not in self.sets:
             self.sets[set_key] = ORSet(
                 self.node_id, description=f"Active {event_type} hazards"
@@ -162,7 +369,7 @@ class NodeState:
             self.sets[set_key].add(hazard_element)
 
         # store details in a register for context
-        register_key = f"infra:{location}:{event_type}"
+        register_key = _crdt_key("infra", location, event_type)
         if register_key not in self.registers:
             self.registers[register_key] = LWWRegister(
                 self.node_id, description=f"Latest {event_type} status at {location}"
@@ -179,7 +386,7 @@ class NodeState:
         )
 
         # count the event
-        event_counter_key = f"event_count:{event_type}"
+        event_counter_key = _crdt_key("event_count", event_type)
         if event_counter_key not in self.counters:
             self.counters[event_counter_key] = GCounter(
                 self.node_id, description=f"Number of {event_type} reports recorded"
@@ -197,7 +404,7 @@ class NodeState:
     def _record_general(self, event_id, event_type, data):
         """General/uncategorized events. Backward-compatible behavior."""
         # count event type
-        counter_key = f"event_count:{event_type}"
+        counter_key = _crdt_key("event_count", event_type)
         if counter_key not in self.counters:
             self.counters[counter_key] = GCounter(
                 self.node_id, description=f"Number of {event_type} events recorded"
@@ -208,7 +415,7 @@ class NodeState:
         location = data.get("location")
         register_key = None
         if location and "value" in data:
-            register_key = f"general:{location}:{event_type}"
+            register_key = _crdt_key("general", location, event_type)
             if register_key not in self.registers:
                 self.registers[register_key] = LWWRegister(
                     self.node_id, description=f"Latest {event_type} at {location}"
@@ -229,21 +436,27 @@ class NodeState:
 
     def get_event_count(self, event_type=None):
         if event_type:
-            key = f"event_count:{event_type}"
+            key = _crdt_key("event_count", event_type)
             c = self.counters.get(key)
             return c.value if c else 0
-        return sum(c.value for c in self.counters.values())
+        if "event_count" not in self._derived:
+            self._derived["event_count"] = sum(c.value for c in self.counters.values())
+        return self._derived["event_count"]
 
     def summary(self):
-        """Human-readable summary of current state."""
-        sensor_keys = [k for k in self.registers if k.startswith("sensor:")]
-        resource_keys = list(self.pn_counters.keys())
-        infra_keys = list(self.sets.keys())
+        """Human-readable summary of current state.
+
+        Cached until the next mutation; treat the result as read-only.
+        """
+        if "summary" not in self._derived:
+            self._derived["summary"] = self._build_summary()
+        return self._derived["summary"]
 
+    def _build_summary(self):
         return {
-            "sensor_readings": len(sensor_keys),
-            "resource_trackers": len(resource_keys),
-            "active_hazard_sets": len(infra_keys),
+            "sensor_readings": self._sensor_readings,
+            "resource_trackers": len(self.pn_counters),
+            "active_hazard_sets": len(self.sets),
             "total_events": self.get_event_count(),
             "crdt_counts": {
                 "g_counters": len(self.counters),
@@ -255,7 +468,7 @@ class NodeState:
 
     def merge(self, other):
         """Merge another node's state. All CRDTs merge independently.
-        Only bumps version if state actually changed."""
+        Only bumps version if state actually changed. Returns the new merkle root."""
         old_root = self.merkle_root()
 
         # merge G-Counters
@@ -273,6 +486,8 @@ class NodeState:
                 self.registers[key] = LWWRegister(
                     self.node_id, description=reg.description
                 )
+                if key.startswith("sensor:"):
+                    self._sensor_readings += 1
             self.registers[key].merge(reg)
 
         # merge PN-Counters
@@ -296,54 +511,218 @@ class NodeState:
             if eid not in self.event_ids:
                 self.event_ids.append(eid)
 
-        if self.merkle_root() != old_root:
+        self._absorb_dots(other.dots, other.event_dots, advance=not other.partial)
+
+        # only entries the other side has can have changed
+        self._invalidate(other._leaf_keys())
+        new_root = self.merkle_root()
+        if new_root != old_root:
             self.version += 1
             self.updated_at = datetime.utcnow()
+            # version is part of to_dict(), so drop the views built above,
+            # keeping the leaf hashes and root, which do not depend on it
+            derived = self._derived
+            self._invalidate(())
+            for view in ("leaves", "root", "subtree_roots"):
+                if view in derived:
+                    self._derived[view] = derived[view]
+        return new_root
+
+    def _sections(self):
+        """(leaf tag, CRDT dict) pairs, in merkle order."""
+        return (
+            ("c", self.counters),
+            ("r", self.registers),
+            ("pn", self.pn_counters),
+            ("s", self.sets),
+        )
+
+    def _leaf_keys(self):
+        for tag, section in self._sections():
+            for key in section:
+                yield f"{tag}:{key}"
+
+    def _leaf_payload(self, tag, key):
+        """The hashed content of one CRDT entry, or None if it does not exist."""
+        if tag == "c":
+            counter = self.counters.get(key)
+            return None if counter is None else counter.counts
+        if tag == "r":
+            reg = self.registers.get(key)
+            if reg is None:
+                return None
+            return {"v": reg._value, "t": reg._iso_timestamp(), "w": reg._writer_id}
+        if tag == "pn":
+            pnc = self.pn_counters.get(key)
+            if pnc is None:
+                return None
+            return {"p": pnc._p.counts, "n": pnc._n.counts}
+        orset = self.sets.get(key)
+        return None if orset is None else orset._elements
+
+    def _merkle_leaf_hashes(self):
+        """Hash every CRDT entry into a leaf keyed by "<tag>:<key>".
+
+        Leaves come out in merkle order (counters, registers, pn-counters,
+        sets; keys sorted within each) and are cached until the next mutation.
+        Digests of leaves the mutation did not touch are reused.
+        """
+        if "leaves" in self._derived:
+            return self._derived["leaves"]
+
+        digests = self._leaf_digests
+        stale = self._stale_leaves
+        if stale is None:
+            digests.clear()
+            stale = self._leaf_keys()
+        for leaf in stale:
+            tag, key = leaf.split(":", 1)
+            payload = self._leaf_payload(tag, key)
+            if payload is None:
+                digests.pop(leaf, None)
+            else:
+                digests[leaf] = _leaf_digest(leaf, payload)
+        self._stale_leaves = set()
+
+        leaves = {}
+        for tag, section in self._sections():
+            for key in sorted(section):
+                leaf = f"{tag}:{key}"
+                leaves[leaf] = digests[leaf]
+
+        self._derived["leaves"] = leaves
+        return leaves
+
+    @staticmethod
+    def _pair_hash(below, i):
+        # an odd node out is paired with itself
+        left = below[i]
+        right = below[i + 1] if i + 1 < len(below) else left
+        return _digest((left + right).encode())
+
+    @classmethod
+    def _tree_levels(cls, hashes):
+        """Every level of the pairwise hash tree, leaves first, root last."""
+        levels = [hashes]
+        while len(hashes) > 1:
+            hashes = [cls._pair_hash(hashes, i) for i in range(0, len(hashes), 2)]
+            levels.append(hashes)
+        return levels
+
+    @classmethod
+    def _combine_hashes(cls, hashes):
+        if not hashes:
+            return _digest(b"empty")
+        return cls._tree_levels(hashes)[-1][0]
 
     def merkle_root(self):
         """Compute a hash fingerprint of the current state for quick comparison.
         Includes all four CRDT types."""
-        leaves = []
-
-        # G-Counters
-        for key in sorted(self.counters):
-            raw = f"c:{key}:{json.dumps(self.counters[key].counts, sort_keys=True)}"
-            leaves.append(hashlib.sha256(raw.encode()).hexdigest())
-
-        # LWW-Registers
-        for key in sorted(self.registers):
-            reg = self.registers[key]
-            raw = f"r:{key}:{json.dumps({'v': reg._value, 't': reg._timestamp.isoformat(), 'w': reg._writer_id}, sort_keys=True)}"
-            leaves.append(hashlib.sha256(raw.encode()).hexdigest())
-
-        # PN-Counters
-        for key in sorted(self.pn_counters):
-            pnc = self.pn_counters[key]
-            raw = f"pn:{key}:{json.dumps({'p': pnc._p.counts, 'n': pnc._n.counts}, sort_keys=True)}"
-            leaves.append(hashlib.sha256(raw.encode()).hexdigest())
-
-        # OR-Sets
-        for key in sorted(self.sets):
-            orset = self.sets[key]
-            raw = f"s:{key}:{json.dumps({e: sorted(t) for e, t in orset._elements.items()}, sort_keys=True)}"
-            leaves.append(hashlib.sha256(raw.encode()).hexdigest())
-
-        if not leaves:
-            return hashlib.sha256(b"empty").hexdigest()
-
-        # simple pairwise hashing until one root remains
-        while len(leaves) > 1:
-            next_level = []
-            for i in range(0, len(leaves), 2):
-                left = leaves[i]
-                right = leaves[i + 1] if i + 1 < len(leaves) else left
-                combined = hashlib.sha256((left + right).encode()).hexdigest()
-                next_level.append(combined)
-            leaves = next_level
-
-        return leaves[0]
+        if "root" not in self._derived:
+            self._derived["root"] = self._update_merkle_tree()
+        return self._derived["root"]
+
+    def _update_merkle_tree(self):
+        leaves = self._merkle_leaf_hashes()
+        keys = list(leaves)
+        hashes = list(leaves.values())
+        if not hashes:
+            self._merkle_tree = None
+            return _digest(b"empty")
+
+        tree = self._merkle_tree
+        if tree is None or tree[0] != keys:
+            # a leaf was added or removed, shifting every pair after it
+            levels = self._tree_levels(hashes)
+            self._merkle_tree = (keys, levels)
+            return levels[-1][0]
+
+        levels = tree[1]
+        changed = {
+            i for i, (old, new) in enumerate(zip(levels[0], hashes)) if old != new
+        }
+        levels[0] = hashes
+        for depth in range(1, len(levels)):
+            below, level = levels[depth - 1], levels[depth]
+            changed = {i // 2 for i in changed}
+            for parent in changed:
+                level[parent] = self._pair_hash(below, parent * 2)
+        return levels[-1][0]
+
+    def subtree_keys(self, prefix):
+        """Leaf hashes for every CRDT entry whose leaf key starts with prefix."""
+        return {
+            key: digest
+            for key, digest in self._merkle_leaf_hashes().items()
+            if key.startswith(prefix)
+        }
+
+    def subtree_root(self, prefix):
+        """Merkle root over the leaves under prefix. subtree_root("") == merkle_root()."""
+        if not prefix:
+            return self.merkle_root()
+        roots = self._derived.setdefault("subtree_roots", {})
+        if prefix not in roots:
+            roots[prefix] = self._combine_hashes(
+                list(self.subtree_keys(prefix).values())
+            )
+        return roots[prefix]
+
+    def subtree_roots(self):
+        """Roots of the per-CRDT-type subtrees, used to localize divergence."""
+        return {prefix: self.subtree_root(prefix) for prefix in SUBTREE_PREFIXES}
+
+    def leaves_dict(self, leaf_keys):
+        """Serialize only the CRDT entries named by leaf_keys.
+
+        The result has the same shape as to_dict(), so it can be fed to
+        from_dict() and merged like a full state. Unknown keys are skipped.
+        Only the events whose dot is the latest write on one of those leaves
+        are listed, so the payload stays proportional to the leaves sent.
+        """
+        sections = {
+            "c": ("counters", self.counters),
+            "r": ("registers", self.registers),
+            "pn": ("pn_counters", self.pn_counters),
+            "s": ("sets", self.sets),
+        }
+        data = {
+            "node_id": self.node_id,
+            "version": self.version,
+            "updated_at": self.updated_at.isoformat(),
+            "counters": {},
+            "registers": {},
+            "pn_counters": {},
+            "sets": {},
+        }
+        dots = {}
+        for leaf_key in leaf_keys:
+            tag, _, key = leaf_key.partition(":")
+            if tag not in sections:
+                continue
+            field, crdts = sections[tag]
+            if key in crdts:
+                data[field][key] = crdts[key].to_dict()
+                if leaf_key in self.dots:
+                    dots[leaf_key] = dict(self.dots[leaf_key])
+        data["dots"] = dots
+        written = {dot for origins in dots.values() for dot in origins.items()}
+        data["event_dots"] = {
+            eid: list(dot)
+            for eid, dot in self.event_dots.items()
+            if tuple(dot) in written
+        }
+        data["event_ids"] = list(data["event_dots"])
+        return data
 
     def to_dict(self):
+        """Serialize the full state. Cached until the next mutation, so
+        callers must treat the result as read-only."""
+        if "dict" not in self._derived:
+            self._derived["dict"] = self._build_dict()
+        return self._derived["dict"]
+
+    def _build_dict(self):
         return {
             "node_id": self.node_id,
             "version": self.version,
@@ -353,6 +732,9 @@ class NodeState:
             "pn_counters": {k: v.to_dict() for k, v in self.pn_counters.items()},
             "sets": {k: v.to_dict() for k, v in self.sets.items()},
             "event_ids": list(self.event_ids),
+            "dots": {k: dict(v) for k, v in self.dots.items()},
+            "event_dots": {eid: list(dot) for eid, dot in self.event_dots.items()},
+            "version_vector": self.version_vector(),
             "merkle_root": self.merkle_root(),
             "state_summary": self.summary(),
         }
@@ -368,9 +750,15 @@ class NodeState:
         s.registers = {
             k: LWWRegister.from_dict(v) for k, v in data.get("registers", {}).items()
         }
+        s._sensor_readings = sum(1 for k in s.registers if k.startswith("sensor:"))
         s.pn_counters = {
             k: PNCounter.from_dict(v) for k, v in data.get("pn_counters", {}).items()
         }
         s.sets = {k: ORSet.from_dict(v) for k, v in data.get("sets", {}).items()}
         s.event_ids = list(data.get("event_ids", []))
+        s.partial = bool(data.get("partial", False))
+        # the version vector is derived from the dots we actually hold rather
+        # than trusted from the payload, which may be a partial state
+        s._absorb_dots(data.get("dots", {}), data.get("event_dots", {}))
+        s._invalidate()
         return s
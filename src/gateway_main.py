@@ -17,6 +17,7 @@ from pydantic import BaseModel
 from src.config import config
 from src.storage import SQLiteStore
 from src.services.gateway import GatewayService
+from src.services.intake import ORJSONResponse
 
 logging.basicConfig(
     format="%(message)s", level=getattr(logging, config.log_level, logging.INFO)
@@ -34,7 +35,7 @@ structlog.configure(
 
 log = structlog.get_logger()
 
-app = FastAPI(title="Edge Mesh Gateway")
+app = FastAPI(title="Edge Mesh Gateway", default_response_class=ORJSONResponse)
 
 store = SQLiteStore(f"{config.data_dir}/gateway.db")
 gateway = GatewayService(config, store)
@@ -135,7 +136,7 @@ async def trigger_poll():
 
 @app.get("/gateway/merged-state")
 async def merged_state():
-    snapshot = store.get_latest_snapshot()
+    snapshot = await asyncio.to_thread(store.get_latest_snapshot)
     if not snapshot:
         return {"status": "no data yet, trigger a poll first"}
     return snapshot
@@ -143,20 +144,20 @@ async def merged_state():
 
 @app.get("/gateway/history")
 async def snapshot_history(limit: int = 20):
-    return store.get_snapshot_history(limit)
+    return await asyncio.to_thread(store.get_snapshot_history, limit)
 
 
 @app.get("/gateway/divergence")
 async def divergence():
     return {
         "is_divergent": gateway.is_divergent,
-        "log": store.get_divergence_log(20),
+        "log": await asyncio.to_thread(store.get_divergence_log, 20),
     }
 
 
 @app.get("/gateway/metrics")
 async def metrics(name: Optional[str] = None, limit: int = 100):
-    return store.get_metrics(name, limit)
+    return await asyncio.to_thread(store.get_metrics, name, limit)
 
 
 # --- Start ---
@@ -186,15 +187,21 @@ async def main():
         gateway.stop()
         raise asyncio.CancelledError()
 
+    serving = asyncio.create_task(server.serve())
+    polling = asyncio.create_task(gateway.start_polling(interval=poll_interval))
     try:
-        await asyncio.gather(
-            server.serve(),
-            gateway.start_polling(interval=poll_interval),
-            wait_shutdown(),
-        )
+        await asyncio.gather(serving, polling, wait_shutdown())
     except asyncio.CancelledError:
         pass
     finally:
+        # gather returns without stopping the other tasks, so a poll (or a
+        # /gateway/poll request) could still be in flight; wind both down
+        # before the HTTP session and the store they write to are closed
+        server.should_exit = True
+        polling.cancel()
+        await asyncio.gather(serving, polling, return_exceptions=True)
+        await gateway.close()
+        store.close()
         log.info("gateway_stopped")
 
 
@@ -1,8 +1,20 @@
+import functools
 import hashlib
 import json
 import os
+import time
 from datetime import datetime
 
+# one reusable encoder; json.dumps(..., sort_keys=True) builds a new one per call
+_canonical_json = json.JSONEncoder(sort_keys=True).encode
+
+# chain hashes are published through /log, so sha256 stays the default for
+# outside verifiers; blake2b (same 32-byte width) is faster in software
+HASH_ALGORITHMS = {
+    "sha256": hashlib.sha256,
+    "blake2b": functools.partial(hashlib.blake2b, digest_size=32),
+}
+
 
 class HashChainLog:
     """
@@ -10,11 +22,18 @@ class HashChainLog:
     This makes the log tamper-evident -- changing any entry breaks the chain.
     """
 
-    def __init__(self, node_id, data_dir="/data/logs"):
+    def __init__(self, node_id, data_dir="/data/logs", algorithm="sha256"):
+        if algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"unsupported hash chain algorithm: {algorithm}")
         self.node_id = node_id
+        self.algorithm = algorithm
+        self._hash = HASH_ALGORITHMS[algorithm]
         self.entries = []
         self.data_dir = data_dir
         os.makedirs(data_dir, exist_ok=True)
+        # entries[:_verified_count] passed the last walk at _verified_at
+        self._verified_count = 0
+        self._verified_at = None
 
     def append(self, event_id, event_type, event_data):
         prev_hash = self.entries[-1]["hash"] if self.entries else "genesis"
@@ -24,38 +43,55 @@ class HashChainLog:
             "timestamp": datetime.utcnow().isoformat(),
             "event_id": event_id,
             "event_type": event_type,
-            "data_hash": hashlib.sha256(
-                json.dumps(event_data, sort_keys=True).encode()
-            ).hexdigest(),
+            "data_hash": self._hash(_canonical_json(event_data).encode()).hexdigest(),
             "prev_hash": prev_hash,
         }
         # hash the entry itself (including prev_hash) to form the chain
-        entry["hash"] = hashlib.sha256(
-            json.dumps(entry, sort_keys=True).encode()
-        ).hexdigest()
+        entry["hash"] = self._hash(_canonical_json(entry).encode()).hexdigest()
 
         self.entries.append(entry)
         return entry
 
     def verify(self):
         """Walk the chain and check every hash link."""
-        for i, entry in enumerate(self.entries):
+        valid = self._verify_from(0)
+        if valid:
+            self._verified_count = len(self.entries)
+            self._verified_at = time.monotonic()
+        return valid
+
+    def verify_cached(self, max_age=30.0):
+        """Like verify(), but trusts a full walk done within max_age seconds.
+
+        Entries appended since that walk are still checked, so the result is
+        current for new data; in-place tampering with older entries shows up
+        on the next full walk.
+        """
+        if self._verified_at is None or time.monotonic() - self._verified_at > max_age:
+            return self.verify()
+        if not self._verify_from(self._verified_count):
+            return False
+        self._verified_count = len(self.entries)
+        return True
+
+    def _verify_from(self, start):
+        for i in range(start, len(self.entries)):
+            entry = self.entries[i]
             expected_prev = self.entries[i - 1]["hash"] if i > 0 else "genesis"
             if entry["prev_hash"] != expected_prev:
                 return False
 
             check = dict(entry)
             stored_hash = check.pop("hash")
-            if (
-                hashlib.sha256(json.dumps(check, sort_keys=True).encode()).hexdigest()
-                != stored_hash
-            ):
+            digest = self._hash(_canonical_json(check).encode()).hexdigest()
+            if digest != stored_hash:
                 return False
 
         return True
 
-    def get_entries(self, since=0):
-        return self.entries[since:]
+    def get_entries(self, since=0, limit=None):
+        end = None if limit is None else since + limit
+        return self.entries[since:end]
 
     def latest_hash(self):
         return self.entries[-1]["hash"] if self.entries else "genesis"
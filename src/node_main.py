@@ -32,7 +32,11 @@ log = structlog.get_logger()
 
 async def main():
     state = NodeState(config.node_id)
-    chain = HashChainLog(config.node_id, f"{config.data_dir}/logs")
+    chain = HashChainLog(
+        config.node_id,
+        f"{config.data_dir}/logs",
+        algorithm=config.hash_chain_algorithm,
+    )
     intake = IntakeService(config, state, chain)
     gossip = GossipService(config, state)
 
@@ -1,5 +1,6 @@
 import asyncio
 from datetime import datetime
+import threading
 import structlog
 import docker
 import uuid
@@ -21,6 +22,12 @@ class DockerManager:
         self._next_ip_suffix = 20  # start dynamic nodes at .20
         self._next_host_port = 8010  # fallback for non-numeric node IDs
         self.isolated_nodes = set()  # track container names of isolated nodes
+        # create_node may run on several threads at once; names, IPs and host
+        # ports are handed out under this lock
+        self._alloc_lock = threading.Lock()
+        self._pending_nodes = set()  # container names still being created
+        # name -> list_nodes() entry; rebuilt lazily after any change we make
+        self._nodes_by_name = None
 
     def _next_ip(self):
         ip = f"{SUBNET}.{self._next_ip_suffix}"
@@ -76,7 +83,7 @@ class DockerManager:
             if number is not None:
                 numbers.add(number)
 
-        for container_name in self.managed_nodes:
+        for container_name in [*self.managed_nodes, *self._pending_nodes]:
             number = self._node_number_from_name(container_name)
             if number is not None:
                 numbers.add(number)
@@ -169,8 +176,15 @@ class DockerManager:
                         ),
                     }
                 )
+        self._nodes_by_name = {node["name"]: node for node in nodes}
         return nodes
 
+    def get_node(self, name):
+        """Return the list_nodes() entry for a container name, or None."""
+        if self._nodes_by_name is None:
+            self.list_nodes()
+        return self._nodes_by_name.get(name)
+
     def list_gateways(self):
         """List all running gateway containers with internal service URLs."""
         gateways = []
@@ -191,11 +205,31 @@ class DockerManager:
 
     def create_node(self, node_id=None):
         """Spin up a new edge node container and register it with the gateway."""
-        if node_id is None:
-            node_id = self._next_available_node_id()
+        with self._alloc_lock:
+            if node_id is None:
+                node_id = self._next_available_node_id()
+            container_name = f"edge-node-{node_id.replace('node-', '')}"
+            if container_name in self._pending_nodes:
+                return self._action_response(
+                    action="create_node",
+                    target=container_name,
+                    status="already_exists",
+                    message=f"{container_name} is already being created",
+                    node_id=node_id,
+                    container=container_name,
+                )
+            # nodes created alongside this one are not running yet, so reach
+            # them by container name instead of by IP
+            siblings = [f"{name}:9000" for name in sorted(self._pending_nodes)]
+            self._pending_nodes.add(container_name)
 
-        container_name = f"edge-node-{node_id.replace('node-', '')}"
+        try:
+            return self._create_node(node_id, container_name, siblings)
+        finally:
+            with self._alloc_lock:
+                self._pending_nodes.discard(container_name)
 
+    def _create_node(self, node_id, container_name, siblings):
         # if container name exists, resolve before creating to avoid Docker 409 conflict
         try:
             existing_container = self.client.containers.get(container_name)
@@ -216,16 +250,17 @@ class DockerManager:
             existing_container.remove(force=True)
             self.managed_nodes.pop(container_name, None)
             self.isolated_nodes.discard(container_name)
+            self._nodes_by_name = None
         except docker.errors.NotFound:
             pass
 
-        ip = self._next_ip()
+        with self._alloc_lock:
+            ip = self._next_ip()
+            host_port = self._select_host_port(node_id)
         http_port = 8000
 
-        host_port = self._select_host_port(node_id)
-
         # figure out existing peers
-        peers = []
+        peers = list(siblings)
         for container in self.client.containers.list():
             if "edge-node" in container.name and container.status == "running":
                 networks = container.attrs.get("NetworkSettings", {}).get(
@@ -272,6 +307,7 @@ class DockerManager:
             "http_port": http_port,
             "host_port": host_port,
         }
+        self._nodes_by_name = None
 
         # register with gateway for polling
         if self.gateway is not None:
@@ -317,6 +353,7 @@ class DockerManager:
 
         self.managed_nodes.pop(container_name, None)
         self.isolated_nodes.discard(container_name)
+        self._nodes_by_name = None
         if self.gateway is not None:
             self.gateway.unregister_node(container_name)
         log.info("node_removed", node_id=node_id, container=container_name)
@@ -346,6 +383,7 @@ class DockerManager:
             container.exec_run("iptables -A INPUT -p udp -j DROP")
             container.exec_run("iptables -A OUTPUT -p udp -j DROP")
             self.isolated_nodes.add(container_name)
+            self._nodes_by_name = None
             log.info("node_isolated", node_id=node_id)
             return self._action_response(
                 action="isolate_node",
@@ -379,6 +417,7 @@ class DockerManager:
             container.exec_run("iptables -F INPUT")
             container.exec_run("iptables -F OUTPUT")
             self.isolated_nodes.discard(container_name)
+            self._nodes_by_name = None
             log.info("node_healed", node_id=node_id)
             return self._action_response(
                 action="heal_node",
@@ -405,6 +444,7 @@ class DockerManager:
                 results.append(container.name)
 
         self.isolated_nodes.clear()
+        self._nodes_by_name = None
         log.info("all_healed", nodes=results)
         return self._action_response(
             action="heal_all",
@@ -457,6 +497,7 @@ class DockerManager:
         # This is simplification but effective for demo visualization
         for c in nodes:
             self.isolated_nodes.add(c.name)
+        self._nodes_by_name = None
 
         log.info(
             "split_brain_created",
@@ -1,7 +1,11 @@
 import asyncio
 import time
+from urllib.parse import urlencode
+
 import structlog
 import aiohttp
+import msgpack
+import orjson
 
 from ..config import Config
 from ..crdt import NodeState
@@ -9,6 +13,10 @@ from ..storage import SQLiteStore
 
 log = structlog.get_logger()
 
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# state-shaped responses (/state, /state/delta, /state/leaves) come back packed
+STATE_HEADERS = {"Accept": f"{MSGPACK_MEDIA_TYPE}, application/json"}
+
 
 class GatewayService:
     """
@@ -16,9 +24,11 @@ class GatewayService:
     merges states, and stores snapshots to SQLite.
     """
 
-    def __init__(self, config: Config, store: SQLiteStore):
+    def __init__(self, config: Config, store: SQLiteStore, session_factory=None):
         self.config = config
         self.store = store
+        # builds the polling session on first use; tests pass a fake here
+        self._session_factory = session_factory or self._default_session
         self.edge_nodes = {}  # node_id -> {"url": "http://...", "last_merkle": "..."}
         self.merged_state = None
         self.is_divergent = False
@@ -26,6 +36,12 @@ class GatewayService:
         self.poll_count = 0
         self.running = False
         self.node_health = {}
+        self._session = None  # kept alive across polls; see _http_session
+        # bumped whenever edge_nodes changes; get_status reuses the
+        # registered_nodes map built for the current epoch
+        self._status_epoch = 0
+        self._status_nodes_epoch = None
+        self._status_nodes = None
         self.runtime_metrics = {
             "polls_started": 0,
             "polls_completed": 0,
@@ -37,6 +53,10 @@ class GatewayService:
             "state_merges_successful": 0,
             "state_merges_failed": 0,
             "stale_state_skips": 0,
+            "subtree_delta_fetches": 0,
+            "subtree_leaves_fetched": 0,
+            "state_delta_fetches": 0,
+            "merkle_unchanged_skips": 0,
             "consecutive_divergent_polls": 0,
             "divergence_started_at": None,
             "divergence_duration_seconds": 0.0,
@@ -49,6 +69,12 @@ class GatewayService:
 
         self.http_retry_attempts = config.gateway_http_retries
         self.http_retry_backoff_ms = config.gateway_http_retry_backoff_ms
+        # seconds to wait after failed attempt n (linear backoff), worked out
+        # once; zero delays are skipped outright in _get_json_with_retry
+        self._retry_delays = [
+            self.http_retry_backoff_ms / 1000.0 * attempt
+            for attempt in range(1, self.http_retry_attempts)
+        ]
         self.node_failure_backoff_seconds = config.gateway_node_failure_backoff
 
         # parse EDGE_NODES env: "edge-node-1:8000,edge-node-2:8000"
@@ -57,26 +83,34 @@ class GatewayService:
                 continue
             host, port = entry.rsplit(":", 1)
             node_id = host  # use hostname as node id
-            self.edge_nodes[node_id] = {
-                "url": f"http://{host}:{port}",
-                "last_merkle": None,
-                "last_version": None,
-            }
+            self.edge_nodes[node_id] = self._node_entry(f"http://{host}:{port}")
             self._ensure_node_health(node_id)
 
-    def register_node(self, node_id, url):
-        """Register a new edge node (used by Docker manager when creating nodes)."""
-        self.edge_nodes[node_id] = {
+    @staticmethod
+    def _node_entry(url, last_merkle=None, last_version=None):
+        # endpoint URLs are built once per registration, not on every poll
+        return {
             "url": url,
-            "last_merkle": None,
-            "last_version": None,
+            "merkle_url": f"{url}/state/merkle",
+            "state_url": f"{url}/state",
+            "subtree_url": f"{url}/state/subtree",
+            "delta_url": f"{url}/state/delta",
+            "leaves_url": f"{url}/state/leaves",
+            "last_merkle": last_merkle,
+            "last_version": last_version,
         }
+
+    def register_node(self, node_id, url):
+        """Register a new edge node (used by Docker manager when creating nodes)."""
+        self.edge_nodes[node_id] = self._node_entry(url)
+        self._status_epoch += 1
         self._ensure_node_health(node_id)
         log.info("node_registered", node_id=node_id, url=url)
 
     def unregister_node(self, node_id):
         """Remove an edge node."""
         self.edge_nodes.pop(node_id, None)
+        self._status_epoch += 1
         self.node_health.pop(node_id, None)
         log.info("node_unregistered", node_id=node_id)
 
@@ -90,14 +124,24 @@ class GatewayService:
                 continue
 
             existing = self.edge_nodes.get(node_id, {})
-            desired[node_id] = {
-                "url": url,
-                "last_merkle": existing.get("last_merkle"),
-                "last_version": existing.get("last_version"),
-            }
+            desired[node_id] = self._node_entry(
+                url,
+                last_merkle=existing.get("last_merkle"),
+                last_version=existing.get("last_version"),
+            )
+            if existing.get("url") == url:
+                for field in (
+                    "subtree_roots",
+                    "leaf_hashes",
+                    "known_vv",
+                    "last_merkle_root",
+                ):
+                    if field in existing:
+                        desired[node_id][field] = existing[field]
 
         removed = [node_id for node_id in self.edge_nodes if node_id not in desired]
         self.edge_nodes = desired
+        self._status_epoch += 1
 
         for node_id in desired:
             self._ensure_node_health(node_id)
@@ -140,19 +184,42 @@ class GatewayService:
         health["last_latency_ms"] = round(latency_ms, 2)
         health["backoff_until"] = 0.0
 
-    async def _get_json_with_retry(self, session, node_id, url):
+    @staticmethod
+    def _default_session():
+        return aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=5),
+            connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60),
+        )
+
+    def _http_session(self):
+        # one keep-alive session for every poll, so node connections are
+        # reused instead of re-established each cycle
+        if self._session is None:
+            self._session = self._session_factory()
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get_json_with_retry(self, session, node_id, url, headers=None):
         self._ensure_node_health(node_id)
         now = time.time()
         if now < self.node_health[node_id]["backoff_until"]:
             return None
 
         last_error = None
+        retry_delays = self._retry_delays
         for attempt in range(1, self.http_retry_attempts + 1):
             self.runtime_metrics["total_http_requests"] += 1
             started = time.time()
             try:
-                async with session.get(url) as resp:
-                    data = await resp.json()
+                async with session.get(url, headers=headers) as resp:
+                    if resp.content_type == MSGPACK_MEDIA_TYPE:
+                        data = msgpack.unpackb(await resp.read(), raw=False)
+                    else:
+                        data = await resp.json(loads=orjson.loads)
                 latency_ms = (time.time() - started) * 1000
                 self.runtime_metrics["total_http_success"] += 1
                 self._mark_node_success(node_id, latency_ms)
@@ -162,12 +229,111 @@ class GatewayService:
                 last_error = error
                 if attempt < self.http_retry_attempts:
                     self.runtime_metrics["http_retries"] += 1
-                    await asyncio.sleep((self.http_retry_backoff_ms / 1000.0) * attempt)
+                    delay = retry_delays[attempt - 1]
+                    if delay:
+                        await asyncio.sleep(delay)
 
         self._mark_node_failure(node_id, last_error)
         log.warning("http_request_failed", node=node_id, url=url, error=str(last_error))
         return None
 
+    async def _fetch_node_state(self, session, node_id):
+        """Fetch a node's state, pulling only what changed since the last poll.
+
+        The first fetch is a full /state. After that, a node whose merkle probe
+        reported its version vector is asked for /state/delta: the writes
+        newer than the vector we already merged, in one request. Older nodes
+        fall back to the subtree walk: the cached subtree roots and leaf hashes
+        are compared, leaves are listed only for the subtrees that differ, and
+        just the leaves whose hash moved are requested.
+
+        Returns (state_dict, subtree_roots, leaf_hashes). The hash views are
+        None after a full fetch and should be derived from the decoded state,
+        and empty after a delta, which says nothing about the whole tree.
+        """
+        info = self.edge_nodes.get(node_id)
+        if info is None:  # unregistered while the poll was in flight
+            return None
+
+        known_vv = info.get("known_vv")
+        remote_vv = info.get("remote_vv")
+        if self.merged_state is not None and known_vv and remote_vv is not None:
+            if all(remote_vv.get(o, 0) >= c for o, c in known_vv.items()):
+                query = urlencode({"vv": orjson.dumps(known_vv).decode()})
+                data = await self._get_json_with_retry(
+                    session,
+                    node_id,
+                    f"{info['delta_url']}?{query}",
+                    headers=STATE_HEADERS,
+                )
+                if not data:
+                    return None
+                self.runtime_metrics["state_delta_fetches"] += 1
+                return data, {}, {}
+            # the node's clock went backwards (restarted empty): our vector no
+            # longer describes what it holds, so start over from its state
+            info.pop("known_vv", None)
+
+        if self.merged_state is None or "subtree_roots" not in info:
+            data = await self._get_json_with_retry(
+                session,
+                node_id,
+                info["state_url"],
+                headers=STATE_HEADERS,
+            )
+            if not data:
+                return None
+            return data, None, None
+
+        summary = await self._get_json_with_retry(session, node_id, info["subtree_url"])
+        if not summary:
+            return None
+
+        known_leaves = info["leaf_hashes"]
+        leaf_hashes = dict(known_leaves)
+        wanted = []
+        changed = [
+            prefix
+            for prefix, root in summary["subtrees"].items()
+            if info["subtree_roots"].get(prefix) != root
+        ]
+        # list the differing subtrees side by side rather than one after another
+        subtrees = await asyncio.gather(
+            *[
+                self._get_json_with_retry(
+                    session, node_id, f"{info['subtree_url']}/{prefix}"
+                )
+                for prefix in changed
+            ]
+        )
+        for prefix, subtree in zip(changed, subtrees):
+            if not subtree:
+                return None
+            remote_leaves = subtree["leaves"]
+            leaf_hashes = {
+                k: v for k, v in leaf_hashes.items() if not k.startswith(prefix)
+            }
+            leaf_hashes.update(remote_leaves)
+            wanted.extend(
+                k
+                for k, digest in remote_leaves.items()
+                if known_leaves.get(k) != digest
+            )
+
+        query = urlencode([("keys", key) for key in wanted])
+        data = await self._get_json_with_retry(
+            session,
+            node_id,
+            f"{info['leaves_url']}?{query}",
+            headers=STATE_HEADERS,
+        )
+        if not data:
+            return None
+
+        self.runtime_metrics["subtree_delta_fetches"] += 1
+        self.runtime_metrics["subtree_leaves_fetched"] += len(wanted)
+        return data, summary["subtrees"], leaf_hashes
+
     def _update_divergence_metrics(self):
         now = time.time()
         started_at = self.runtime_metrics["divergence_started_at"]
@@ -201,101 +367,127 @@ class GatewayService:
         merkle_roots = {}
 
         try:
-            async with aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=5)
-            ) as session:
-                # fetch merkle roots from all nodes
-                for node_id, info in self.edge_nodes.items():
-                    data = await self._get_json_with_retry(
-                        session,
-                        node_id,
-                        f"{info['url']}/state/merkle",
-                    )
-                    if not data:
-                        merkle_roots[node_id] = "unreachable"
-                        continue
-                    merkle_roots[node_id] = data.get("merkle_root", "unreachable")
-                    info["last_merkle"] = merkle_roots[node_id]
-
-                # check divergence
-                reachable_roots = {
-                    k: v for k, v in merkle_roots.items() if v != "unreachable"
-                }
-                unique_roots = set(reachable_roots.values())
-                self.is_divergent = len(unique_roots) > 1
-                self.runtime_metrics["last_reachable_nodes"] = len(reachable_roots)
-                self._update_divergence_metrics()
-
-                self.store.log_divergence(self.is_divergent, merkle_roots)
-
-                if self.is_divergent:
-                    log.warning("divergence_detected", roots=merkle_roots)
-
-                # fetch full state from all reachable nodes and merge
-                merge_start = time.time()
-
-                for node_id in reachable_roots:
-                    url = self.edge_nodes[node_id]["url"]
-                    data = await self._get_json_with_retry(
-                        session, node_id, f"{url}/state"
+            session = self._http_session()
+            # fetch merkle roots from all nodes at once
+            nodes = list(self.edge_nodes.items())
+            probes = await asyncio.gather(
+                *[
+                    self._get_json_with_retry(session, node_id, info["merkle_url"])
+                    for node_id, info in nodes
+                ]
+            )
+            for (node_id, info), data in zip(nodes, probes):
+                if not data:
+                    merkle_roots[node_id] = "unreachable"
+                    continue
+                merkle_roots[node_id] = data.get("merkle_root", "unreachable")
+                info["last_merkle"] = merkle_roots[node_id]
+                info["remote_vv"] = data.get("vv")
+
+            # check divergence
+            reachable_roots = {
+                k: v for k, v in merkle_roots.items() if v != "unreachable"
+            }
+            # stop at the first root that disagrees instead of building a set
+            roots = iter(reachable_roots.values())
+            first_root = next(roots, None)
+            self.is_divergent = any(root != first_root for root in roots)
+            self.runtime_metrics["last_reachable_nodes"] = len(reachable_roots)
+            self._update_divergence_metrics()
+
+            self.store.log_divergence(self.is_divergent, merkle_roots)
+
+            if self.is_divergent:
+                log.warning("divergence_detected", roots=merkle_roots)
+
+            # fetch full state from all reachable nodes and merge
+            merge_start = time.time()
+
+            # a node still at the root we last merged from it has nothing new
+            to_fetch = []
+            for node_id, root in reachable_roots.items():
+                merged_root = self.edge_nodes.get(node_id, {}).get("last_merkle_root")
+                if self.merged_state is not None and merged_root == root:
+                    self.runtime_metrics["merkle_unchanged_skips"] += 1
+                else:
+                    to_fetch.append(node_id)
+
+            # fetches run side by side; merges stay sequential, in node order
+            fetches = await asyncio.gather(
+                *[self._fetch_node_state(session, node_id) for node_id in to_fetch]
+            )
+            for node_id, fetched in zip(to_fetch, fetches):
+                if not fetched or node_id not in self.edge_nodes:
+                    continue
+                data, subtree_roots, leaf_hashes = fetched
+                try:
+                    incoming = NodeState.from_dict(data)
+                except Exception as error:
+                    self.runtime_metrics["state_merges_failed"] += 1
+                    log.warning("state_decode_failed", node=node_id, error=str(error))
+                    continue
+
+                last_version = self.edge_nodes[node_id].get("last_version")
+                incoming_version = getattr(incoming, "version", None)
+                if (
+                    last_version is not None
+                    and incoming_version is not None
+                    and incoming_version < last_version
+                ):
+                    self.runtime_metrics["stale_state_skips"] += 1
+                    log.warning(
+                        "stale_state_skipped",
+                        node=node_id,
+                        incoming_version=incoming_version,
+                        last_version=last_version,
                     )
-                    if not data:
-                        continue
-                    try:
-                        incoming = NodeState.from_dict(data)
-                    except Exception as error:
-                        self.runtime_metrics["state_merges_failed"] += 1
-                        log.warning(
-                            "state_decode_failed", node=node_id, error=str(error)
-                        )
-                        continue
-
-                    last_version = self.edge_nodes[node_id].get("last_version")
-                    incoming_version = getattr(incoming, "version", None)
-                    if (
-                        last_version is not None
-                        and incoming_version is not None
-                        and incoming_version < last_version
-                    ):
-                        self.runtime_metrics["stale_state_skips"] += 1
-                        log.warning(
-                            "stale_state_skipped",
-                            node=node_id,
-                            incoming_version=incoming_version,
-                            last_version=last_version,
-                        )
-                        continue
-
-                    if self.merged_state is None:
-                        self.merged_state = NodeState("gateway")
-                        self.merged_state.counters = {}
-
-                    before = self.merged_state.merkle_root()
-                    self.merged_state.merge(incoming)
-                    after = self.merged_state.merkle_root()
-                    self.edge_nodes[node_id]["last_version"] = incoming_version
-                    if before != after:
-                        self.runtime_metrics["state_merges_successful"] += 1
-
-                merge_time = time.time() - merge_start
-                self.runtime_metrics["last_merge_duration_ms"] = round(
-                    merge_time * 1000, 2
+                    continue
+
+                if self.merged_state is None:
+                    self.merged_state = NodeState("gateway")
+                    self.merged_state.counters = {}
+
+                before = self.merged_state.merkle_root()
+                after = self.merged_state.merge(incoming)
+                info = self.edge_nodes[node_id]
+                info["last_version"] = incoming_version
+                # the probe root: what we merged is at least this new
+                info["last_merkle_root"] = reachable_roots[node_id]
+                if subtree_roots is None:
+                    subtree_roots = incoming.subtree_roots()
+                    leaf_hashes = incoming.subtree_keys("")
+                if subtree_roots:
+                    info["subtree_roots"] = subtree_roots
+                    info["leaf_hashes"] = leaf_hashes
+                else:
+                    # a delta leaves the cached tree view stale
+                    info.pop("subtree_roots", None)
+                    info.pop("leaf_hashes", None)
+                known_vv = info.setdefault("known_vv", {})
+                for origin, counter in incoming.version_vector().items():
+                    if counter > known_vv.get(origin, 0):
+                        known_vv[origin] = counter
+                if before != after:
+                    self.runtime_metrics["state_merges_successful"] += 1
+
+            merge_time = time.time() - merge_start
+            self.runtime_metrics["last_merge_duration_ms"] = round(merge_time * 1000, 2)
+
+            # save snapshot
+            if self.merged_state:
+                # the serialized state already carries its root, so one
+                # to_dict() feeds the whole snapshot row
+                state_dict = self.merged_state.to_dict()
+                source_nodes = list(reachable_roots)
+                self.store.save_snapshot(
+                    merkle_root=state_dict["merkle_root"],
+                    node_count=len(source_nodes),
+                    source_nodes=source_nodes,
+                    state_dict=state_dict,
                 )
-
-                # save snapshot
-                if self.merged_state:
-                    root = self.merged_state.merkle_root()
-                    self.store.save_snapshot(
-                        merkle_root=root,
-                        node_count=len(reachable_roots),
-                        source_nodes=list(reachable_roots.keys()),
-                        state_dict=self.merged_state.to_dict(),
-                    )
-                    self.store.save_metric("merge_time_ms", merge_time * 1000)
-                    self.store.save_metric("node_count", len(reachable_roots))
-                    self.store.save_metric(
-                        "is_divergent", 1 if self.is_divergent else 0
-                    )
+                self.store.save_metric("merge_time_ms", merge_time * 1000)
+                self.store.save_metric("node_count", len(source_nodes))
+                self.store.save_metric("is_divergent", 1 if self.is_divergent else 0)
 
             self.last_poll = time.time()
             self.poll_count += 1
@@ -327,9 +519,20 @@ class GatewayService:
             interval=interval,
             nodes=list(self.edge_nodes.keys()),
         )
+        # fixed cadence: each poll is due `interval` after the previous one was
+        # due, so the time a poll takes does not push every later poll back
+        loop = asyncio.get_running_loop()
+        next_deadline = loop.time()
         while self.running:
             await self.poll_once()
-            await asyncio.sleep(interval)
+            next_deadline += interval
+            delay = next_deadline - loop.time()
+            if delay < 0:
+                # overran a whole slot: restart the cadence instead of firing
+                # back-to-back polls to catch up
+                next_deadline -= delay
+                delay = 0
+            await asyncio.sleep(delay)
 
     def stop(self):
         self.running = False
@@ -344,12 +547,18 @@ class GatewayService:
             "last_poll": self.last_poll,
         }
 
+    def _registered_nodes(self):
+        if self._status_nodes_epoch != self._status_epoch:
+            self._status_nodes = {
+                nid: info["url"] for nid, info in self.edge_nodes.items()
+            }
+            self._status_nodes_epoch = self._status_epoch
+        return self._status_nodes
+
     def get_status(self):
         return {
             "node_id": self.config.node_id,
-            "registered_nodes": {
-                nid: info["url"] for nid, info in self.edge_nodes.items()
-            },
+            "registered_nodes": self._registered_nodes(),
             "node_health": self.node_health,
             "is_divergent": self.is_divergent,
             "last_poll": self.last_poll,
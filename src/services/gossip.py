@@ -1,9 +1,17 @@
 import asyncio
-import json
 import socket
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Optional
 import structlog
 import time
 
+import msgpack
+import orjson
+
+from ..bloom import BloomFilter
 from ..config import Config
 from ..crdt import NodeState
 
@@ -11,6 +19,150 @@ log = structlog.get_logger()
 
 MAX_PACKET = 60000
 
+# most state messages folded into one merge while draining the merge queue
+MERGE_BATCH = 32
+
+# seconds a resolved peer address is reused; containers can come back with
+# a new IP after a restart, so entries are refreshed rather than kept forever
+PEER_ADDR_TTL = 30.0
+
+# ticks a peer whose acked version vector already covers ours is skipped
+# before it gets a heartbeat anyway (so a restarted peer re-acks its state)
+DAMPEN_TICKS = 5
+
+# weight of the newest sample in the per-peer RTT moving average
+RTT_ALPHA = 0.25
+
+# first byte of a msgpack-framed datagram; JSON datagrams always start with "{"
+WIRE_MSGPACK = b"\x01"
+# first byte of a fixed-layout merkle digest
+WIRE_DIGEST = b"\x02"
+# first byte of a zlib-compressed frame wrapping one of the above
+WIRE_ZLIB = b"\x03"
+
+# cap on the decompressed size of a WIRE_ZLIB frame
+MAX_DECOMPRESSED = 16 * 1024 * 1024
+
+# digest layout: frame byte, raw 32-byte root, event count, sender id length;
+# the sender id follows as utf-8
+_DIGEST = struct.Struct("!c32sQB")
+
+# hot top-level keys are shortened on the wire
+_WIRE_KEYS = {"type": "t", "sender": "s", "state": "st", "state_summary": "ss"}
+_WIRE_KEYS_REVERSE = {short: key for key, short in _WIRE_KEYS.items()}
+
+
+def encode_message(message):
+    """Frame a gossip message as version byte + msgpack with short keys."""
+    packed = {_WIRE_KEYS.get(k, k): v for k, v in message.items()}
+    return WIRE_MSGPACK + msgpack.packb(packed, use_bin_type=True)
+
+
+def encode_digest(sender, merkle_root, event_count):
+    """Pack a merkle_only digest into 42 bytes plus the sender id.
+
+    The id length travels in one byte. Longer ids are rejected rather than
+    cut, since a cut id could split a UTF-8 character and would no longer
+    match the sender's node id anyway.
+    """
+    sender_id = sender.encode()
+    if len(sender_id) > 255:
+        raise ValueError(f"sender id is {len(sender_id)} bytes, digest allows 255")
+    return (
+        _DIGEST.pack(
+            WIRE_DIGEST, bytes.fromhex(merkle_root), event_count, len(sender_id)
+        )
+        + sender_id
+    )
+
+
+def compress_message(msg):
+    """Wrap an encoded message in a WIRE_ZLIB frame."""
+    return WIRE_ZLIB + zlib.compress(msg, 6)
+
+
+def decode_message(data):
+    """Decode a gossip datagram, accepting legacy JSON from older nodes."""
+    frame = data[:1]
+    if frame == WIRE_ZLIB:
+        inflater = zlib.decompressobj()
+        inner = inflater.decompress(memoryview(data)[1:], MAX_DECOMPRESSED)
+        if inflater.unconsumed_tail:
+            raise ValueError("compressed gossip message exceeds size limit")
+        return decode_message(inner)
+    if frame == WIRE_DIGEST:
+        _, root, event_count, sender_len = _DIGEST.unpack_from(data)
+        sender = bytes(data[_DIGEST.size : _DIGEST.size + sender_len]).decode()
+        return {
+            "type": "merkle_only",
+            "reason": "state_too_large_for_udp",
+            "sender": sender,
+            "merkle_root": root.hex(),
+            "event_count": event_count,
+        }
+    if frame != WIRE_MSGPACK:
+        # orjson parses the datagram bytes as UTF-8 in place; no str is built
+        return orjson.loads(data)
+    packed = msgpack.unpackb(memoryview(data)[1:], raw=False)
+    return {_WIRE_KEYS_REVERSE.get(k, k): v for k, v in packed.items()}
+
+
+@dataclass(slots=True)
+class GossipStats:
+    """Gossip counters, mutated on every datagram; get_stats() snapshots them.
+
+    Durations and timestamps are kept as integer nanoseconds and converted
+    to ms / epoch seconds only when read through get_stats().
+    """
+
+    sent: int = 0
+    received: int = 0
+    merged: int = 0
+    errors: int = 0
+    transport_errors: int = 0
+    payloads_rejected: int = 0
+    sent_bytes: int = 0
+    received_bytes: int = 0
+    broadcast_cycles: int = 0
+    state_sync_sent: int = 0
+    merkle_only_sent: int = 0
+    delta_sent: int = 0
+    compressed_sent: int = 0
+    acks_sent: int = 0
+    acks_received: int = 0
+    merkle_mismatches: int = 0
+    merkle_bloom_sent: int = 0
+    bloom_repairs_sent: int = 0
+    sends_dampened: int = 0
+    redundant_received: int = 0
+    merge_batches: int = 0
+    merge_time_ns_total: int = 0
+    last_merge_ns: int = 0
+    last_message_type: Optional[str] = None
+    last_message_at_ns: Optional[int] = None
+    last_successful_merge_at_ns: Optional[int] = None
+
+
+class _GossipProtocol(asyncio.DatagramProtocol):
+    """Hands datagrams from the asyncio UDP transport to the gossip service."""
+
+    def __init__(self, service):
+        self.service = service
+
+    def datagram_received(self, data, addr):
+        self.service._on_datagram(data, addr)
+
+    def error_received(self, exc):
+        # e.g. ICMP port unreachable from a peer that is down; the socket
+        # stays usable, so just count it
+        self.service.stats.errors += 1
+        self.service.stats.transport_errors += 1
+        log.debug("gossip_transport_error", error=str(exc))
+
+    def connection_lost(self, exc):
+        if self.service.running:
+            log.warning("gossip_transport_closed", error=str(exc) if exc else None)
+
 
 class GossipService:
     """
@@ -19,179 +171,545 @@ class GossipService:
 
     Messages include semantic context:
       - state_sync:  full state with summary of what's inside
+      - delta:       only the writes a peer's version vector has not seen
+      - ack:         receiver's version vector, so the next send can be a delta
       - merkle_only: compact fingerprint with event count for quick comparison
+      - merkle_bloom: reply to a mismatched digest with a bloom filter of our
+                      event ids; the digest's sender answers with a delta of
+                      the events the filter says we lack
     """
 
     def __init__(self, config: Config, state: NodeState):
         self.config = config
         self.state = state
         self.running = False
-        self.sock = None
-        self.stats = {
-            "sent": 0,
-            "received": 0,
-            "merged": 0,
-            "errors": 0,
-            "sent_bytes": 0,
-            "received_bytes": 0,
-            "broadcast_cycles": 0,
-            "state_sync_sent": 0,
-            "merkle_only_sent": 0,
-            "merkle_mismatches": 0,
-            "merge_time_ms_total": 0.0,
-            "last_merge_ms": 0.0,
-            "last_message_type": None,
-            "last_message_at": None,
-            "last_successful_merge_at": None,
-        }
+        self.transport = None
+        # peer (as configured) -> version vector from its last ack
+        self._peer_versions = {}
+        # peer (as configured) -> ((ip, port), resolved_at monotonic)
+        self._peer_addrs = {}
+        # per-peer pacing: smoothed ack RTT, when we last sent, and how many
+        # ticks in a row we skipped it because it already had everything
+        self._peer_rtt = {}
+        self._peer_sent_at = {}
+        self._peer_quiet = {}
+        # encoded full-state/digest bodies, reused across ticks until the
+        # state's revision moves
+        self._shared = {}
+        self._shared_revision = None
+        # state messages wait here while the event loop keeps receiving; set
+        # up by start(), otherwise datagrams are merged inline
+        self._merge_queue = None
+        self._merge_executor = None
+        self._merge_task = None
+        self.stats = GossipStats()
 
     async def start(self):
         self.running = True
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.sock.bind(("0.0.0.0", self.config.gossip_port))
-        self.sock.setblocking(False)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.config.gossip_recv_buffer:
+            # the kernel may clamp this to net.core.rmem_max; best effort
+            try:
+                sock.setsockopt(
+                    socket.SOL_SOCKET, socket.SO_RCVBUF, self.config.gossip_recv_buffer
+                )
+            except OSError as e:
+                log.debug("gossip_rcvbuf_failed", error=str(e))
+        sock.bind(("0.0.0.0", self.config.gossip_port))
 
-        log.info(
-            "gossip_started", port=self.config.gossip_port, peers=self.config.peers
+        # the transport owns the socket from here on; incoming datagrams are
+        # pushed to _on_datagram by the event loop, so no receive thread is needed
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _GossipProtocol(self), sock=sock
+        )
+
+        # decoding remote states runs on a single worker so batches apply in
+        # arrival order; only the final merge touches self.state on the loop
+        self._merge_queue = asyncio.Queue()
+        self._merge_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="gossip-merge"
         )
+        self._merge_task = asyncio.create_task(self._merge_loop())
 
+        # resolve peers up front; ones that are not up yet are retried per tick
         await asyncio.gather(
-            self._broadcast_loop(),
-            self._receive_loop(),
+            *[self._resolve_peer(peer) for peer in self.config.peers],
+            return_exceptions=True,
         )
 
+        log.info(
+            "gossip_started", port=self.config.gossip_port, peers=self.config.peers
+        )
+
+        await self._broadcast_loop()
+
     async def stop(self):
         self.running = False
-        if self.sock:
-            self.sock.close()
+        if self.transport:
+            self.transport.close()
+        if self._merge_task:
+            self._merge_task.cancel()
+        if self._merge_executor:
+            self._merge_executor.shutdown(wait=False)
 
     async def _broadcast_loop(self):
         """Send our state to all peers periodically."""
         while self.running:
             await asyncio.sleep(self.config.gossip_interval)
+            if not self.running:
+                break
             try:
-                self.stats["broadcast_cycles"] += 1
+                self.stats.broadcast_cycles += 1
                 state_summary = self.state.summary()
-                message_type = "state_sync"
-                msg = json.dumps(
-                    {
-                        "type": "state_sync",
-                        "reason": "periodic_sync",
-                        "sender": self.config.node_id,
-                        "state": self.state.to_dict(),
-                        "state_summary": state_summary,
-                    }
-                ).encode()
-
-                if len(msg) > MAX_PACKET:
-                    # if state is too big, send a compact digest
-                    message_type = "merkle_only"
-                    msg = json.dumps(
-                        {
-                            "type": "merkle_only",
-                            "reason": "state_too_large_for_udp",
-                            "sender": self.config.node_id,
-                            "merkle_root": self.state.merkle_root(),
-                            "event_count": self.state.get_event_count(),
-                            "state_summary": state_summary,
-                        }
-                    ).encode()
-
-                loop = asyncio.get_event_loop()
+                # payloads identical for every peer, encoded once per state
+                # revision, so quiet ticks skip serialization entirely
+                if self._shared_revision != self.state.revision:
+                    self._shared = {}
+                    self._shared_revision = self.state.revision
+                shared = self._shared
+
+                now = time.monotonic()
+                our_vv = self.state.version_vector()
+
                 for peer in self.config.peers:
-                    host, port = self._parse_peer(peer)
+                    if self._skip_peer(peer, now, our_vv):
+                        self.stats.sends_dampened += 1
+                        continue
                     try:
-                        await loop.run_in_executor(
-                            None, self.sock.sendto, msg, (host, int(port))
+                        addr = await self._peer_addr(peer)
+                        message_type, msg = self._build_message(
+                            peer, state_summary, shared
                         )
-                        self.stats["sent"] += 1
-                        self.stats["sent_bytes"] += len(msg)
-                        if message_type == "state_sync":
-                            self.stats["state_sync_sent"] += 1
-                        else:
-                            self.stats["merkle_only_sent"] += 1
+                        self.transport.sendto(msg, addr)
+                        self._peer_sent_at[peer] = now
+                        self.stats.sent += 1
+                        self.stats.sent_bytes += len(msg)
+                        counter = f"{message_type}_sent"
+                        setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+                        if msg[:1] == WIRE_ZLIB:
+                            self.stats.compressed_sent += 1
                     except Exception as e:
-                        self.stats["errors"] += 1
+                        self._peer_addrs.pop(peer, None)
+                        self.stats.errors += 1
                         log.debug("gossip_send_failed", peer=peer, error=str(e))
 
             except Exception as e:
                 log.error("broadcast_error", error=str(e))
 
-    async def _receive_loop(self):
-        """Listen for incoming gossip messages and merge them."""
-        loop = asyncio.get_event_loop()
-        while self.running:
-            try:
-                data, addr = await loop.run_in_executor(None, self._recv)
-                if data is None:
-                    continue
-                self.stats["received"] += 1
-                self.stats["received_bytes"] += len(data)
-                message = json.loads(data.decode())
-                self.stats["last_message_type"] = message.get("type")
-                self.stats["last_message_at"] = time.time()
-                self._handle(message)
-            except Exception as e:
-                if self.running:
-                    self.stats["errors"] += 1
-                    log.debug("receive_error", error=str(e))
+    def _skip_peer(self, peer, now, our_vv):
+        """Whether to leave a peer out of this tick.
+
+        A peer is due every gossip_interval * (1 + rtt_seconds), rounded to
+        the nearest tick, so slow links get proportionally fewer sends. A
+        peer whose last ack already covers our version vector would only get
+        an empty delta, so it is skipped for up to DAMPEN_TICKS ticks.
+        """
+        interval = self.config.gossip_interval
+        sent_at = self._peer_sent_at.get(peer)
+        if sent_at is not None:
+            due = sent_at + interval * (1 + self._peer_rtt.get(peer, 0.0))
+            if now + interval / 2 < due:
+                return True
+
+        peer_vv = self._peer_versions.get(peer)
+        if peer_vv is not None and all(
+            peer_vv.get(origin, 0) >= counter for origin, counter in our_vv.items()
+        ):
+            quiet = self._peer_quiet.get(peer, 0)
+            if quiet < DAMPEN_TICKS:
+                self._peer_quiet[peer] = quiet + 1
+                return True
+        self._peer_quiet[peer] = 0
+        return False
+
+    def _build_message(self, peer, state_summary, shared=None):
+        """Encode the sync message for one peer.
+
+        Peers that have acked us get only the writes their version vector is
+        missing; peers we have not heard from yet get the full state (the
+        extreme delta). Either is zlib-compressed if it would not fit in one
+        datagram, and degrades to a merkle digest only if it still does not
+        fit. Full-state and digest bodies are the same for every peer, so
+        they are encoded once into `shared` and only the peer's "to" field is
+        spliced in.
+        """
+        if shared is None:
+            shared = {}
+
+        peer_vv = self._peer_versions.get(peer)
+        if peer_vv is None:
+            message_type = "state_sync"
+            if "state_sync" not in shared:
+                shared["state_sync"] = encode_message(
+                    {
+                        "type": "state_sync",
+                        "reason": "periodic_sync",
+                        "sender": self.config.node_id,
+                        "state": self.state.to_dict(),
+                        "state_summary": state_summary,
+                    }
+                )
+            # the addressed copy is kept with the shared body, so a quiet tick
+            # re-sends the same bytes object without building a new one
+            addressed = ("state_sync", peer)
+            if addressed not in shared:
+                shared[addressed] = self._fit(
+                    self._address_to(peer, shared["state_sync"])
+                )
+            msg = shared[addressed]
+        else:
+            message_type = "delta"
+            msg = self._fit(
+                encode_message(
+                    {
+                        "type": "delta",
+                        "reason": "periodic_sync",
+                        "sender": self.config.node_id,
+                        "to": peer,
+                        "delta": self.state.delta_since(peer_vv),
+                        "vv": self.state.version_vector(),
+                    }
+                )
+            )
+
+        if msg is None:
+            # too big even compressed, send a compact digest
+            message_type = "merkle_only"
+            if "merkle_only" not in shared:
+                shared["merkle_only"] = encode_digest(
+                    self.config.node_id,
+                    self.state.merkle_root(),
+                    self.state.get_event_count(),
+                )
+            msg = shared["merkle_only"]
 
-    def _recv(self):
-        """Blocking recv with timeout so we can check self.running."""
-        self.sock.settimeout(1.0)
+        return message_type, msg
+
+    @staticmethod
+    def _fit(msg):
+        """msg if it fits in a datagram, else its compressed frame, else None."""
+        if len(msg) <= MAX_PACKET:
+            return msg
+        compressed = compress_message(msg)
+        return compressed if len(compressed) <= MAX_PACKET else None
+
+    @staticmethod
+    def _address_to(peer, body):
+        """Add a "to" field to an already-encoded message.
+
+        Gossip messages have fewer than 15 keys, so the msgpack header right
+        after the version byte is a fixmap (0x80 | size); bumping its size and
+        inserting the pair after it avoids re-encoding the body.
+        """
+        size = body[1] & 0x0F
+        return (
+            WIRE_MSGPACK
+            + bytes((0x80 | (size + 1),))
+            + msgpack.packb("to")
+            + msgpack.packb(peer)
+            + body[2:]
+        )
+
+    def _send_ack(self, message, addr):
+        """Tell the sender which writes we now hold so its next send is a delta."""
+        if self.transport is None or addr is None or "to" not in message:
+            return
+        ack = encode_message(
+            {
+                "type": "ack",
+                "sender": self.config.node_id,
+                "peer": message["to"],
+                "vv": self.state.version_vector(),
+            }
+        )
+        self.transport.sendto(ack, addr)
+        self.stats.acks_sent += 1
+
+    def _on_datagram(self, data, addr):
+        """Decode an incoming gossip datagram and merge it."""
         try:
-            return self.sock.recvfrom(MAX_PACKET)
-        except socket.timeout:
-            return None, None
+            self.stats.received += 1
+            self.stats.received_bytes += len(data)
+            message = decode_message(data)
+            self.stats.last_message_type = message.get("type")
+            self.stats.last_message_at_ns = time.time_ns()
+            if self._merge_queue is not None and message.get("type") in (
+                "state_sync",
+                "delta",
+            ):
+                self._merge_queue.put_nowait((message, addr))
+            else:
+                self._handle(message, addr)
+        except Exception as e:
+            if self.running:
+                self.stats.errors += 1
+                log.debug("receive_error", error=str(e))
 
-    def _handle(self, message):
+    def _handle(self, message, addr=None):
         sender = message.get("sender", "unknown")
 
         if sender == self.config.node_id:
             return  # ignore our own messages
 
-        if message["type"] == "state_sync":
-            incoming = NodeState.from_dict(message["state"])
-            old_root = self.state.merkle_root()
-            started = time.time()
-            self.state.merge(incoming)
-            new_root = self.state.merkle_root()
-            elapsed_ms = (time.time() - started) * 1000
-            self.stats["last_merge_ms"] = round(elapsed_ms, 3)
-            self.stats["merge_time_ms_total"] += elapsed_ms
-
-            if old_root != new_root:
-                self.stats["merged"] += 1
-                self.stats["last_successful_merge_at"] = time.time()
-                log.info(
-                    "gossip_merged",
-                    from_node=sender,
-                    reason=message.get("reason", "unknown"),
-                    old_root=old_root[:12],
-                    new_root=new_root[:12],
-                )
+        if message["type"] in ("state_sync", "delta"):
+            remote, failures = self._fold_states([message])
+            if failures[0] is not None:
+                self._reject_payload(message, failures[0])
+                return
+            self._apply_remote(remote, [message])
+            self._send_ack(message, addr)
+
+        elif message["type"] == "ack":
+            peer = message.get("peer")
+            if peer in self.config.peers:
+                self._peer_versions[peer] = message.get("vv") or {}
+                self.stats.acks_received += 1
+                sent_at = self._peer_sent_at.get(peer)
+                if sent_at is not None:
+                    sample = time.monotonic() - sent_at
+                    previous = self._peer_rtt.get(peer)
+                    self._peer_rtt[peer] = (
+                        sample
+                        if previous is None
+                        else (1 - RTT_ALPHA) * previous + RTT_ALPHA * sample
+                    )
 
         elif message["type"] == "merkle_only":
             remote_root = message.get("merkle_root")
-            if remote_root != self.state.merkle_root():
-                self.stats["merkle_mismatches"] += 1
+            local_root = self.state.merkle_root()
+            if remote_root != local_root:
+                self.stats.merkle_mismatches += 1
                 log.info(
                     "merkle_mismatch",
                     from_node=sender,
                     reason=message.get("reason", "unknown"),
-                    ours=self.state.merkle_root()[:12],
+                    ours=local_root[:12],
                     theirs=remote_root[:12],
                     their_event_count=message.get("event_count"),
                 )
+                self._send_bloom(addr)
+
+        elif message["type"] == "merkle_bloom":
+            if message.get("merkle_root") != self.state.merkle_root():
+                self._send_bloom_repair(message, addr)
+
+    def _send_bloom(self, addr):
+        """Describe our event ids to a diverged peer in one datagram."""
+        if self.transport is None or addr is None:
+            return
+        bloom = BloomFilter(len(self.state.event_ids))
+        for event_id in self.state.event_ids:
+            bloom.add(event_id)
+        msg = encode_message(
+            {
+                "type": "merkle_bloom",
+                "sender": self.config.node_id,
+                "merkle_root": self.state.merkle_root(),
+                "bloom": bloom.to_dict(),
+            }
+        )
+        if len(msg) > MAX_PACKET:
+            log.debug("bloom_too_large", size=len(msg))
+            return
+        self.transport.sendto(msg, addr)
+        self.stats.merkle_bloom_sent += 1
+
+    def _send_bloom_repair(self, message, addr):
+        """Send the writes behind the events a peer's bloom filter lacks.
+
+        If the delta would not fit in a datagram, only the newer half of the
+        missing events is covered; the next digest round picks up the rest.
+        If the roots differ but the filter claims every event (a false
+        positive), the whole state goes out as a delta instead, since no
+        event-based repair could ever close the gap.
+        """
+        if self.transport is None or addr is None:
+            return
+        try:
+            bloom = BloomFilter.from_dict(message["bloom"])
+        except (KeyError, ValueError) as e:
+            # untrusted filter: drop the message rather than hash against it
+            self._reject_payload(message, str(e))
+            return
+        missing = [eid for eid in self.state.event_ids if eid not in bloom]
+        if not missing:
+            msg = self._fit(
+                encode_message(
+                    {
+                        "type": "delta",
+                        "reason": "bloom_repair_full",
+                        "sender": self.config.node_id,
+                        "delta": self.state.delta_since({}),
+                        "vv": self.state.version_vector(),
+                    }
+                )
+            )
+            if msg is None:
+                log.debug("bloom_repair_too_large", peer=message.get("sender"))
+                return
+            self.transport.sendto(msg, addr)
+            self.stats.bloom_repairs_sent += 1
+            return
+        while missing:
+            msg = self._fit(
+                encode_message(
+                    {
+                        "type": "delta",
+                        "reason": "bloom_repair",
+                        "sender": self.config.node_id,
+                        "delta": self.state.delta_for_events(missing),
+                        "vv": self.state.version_vector(),
+                    }
+                )
+            )
+            if msg is not None:
+                self.transport.sendto(msg, addr)
+                self.stats.bloom_repairs_sent += 1
+                return
+            if len(missing) == 1:
+                break
+            missing = missing[len(missing) // 2 :]
+        log.debug("bloom_repair_too_large", peer=message.get("sender"))
+
+    async def _merge_loop(self):
+        """Drain queued state messages and merge each batch in one step."""
+        loop = asyncio.get_running_loop()
+        while self.running:
+            batch = [await self._merge_queue.get()]
+            while len(batch) < MERGE_BATCH and not self._merge_queue.empty():
+                batch.append(self._merge_queue.get_nowait())
+
+            batch = [
+                (message, addr)
+                for message, addr in batch
+                if message.get("sender") != self.config.node_id
+            ]
+            if not batch:
+                continue
+            try:
+                remote, failures = await loop.run_in_executor(
+                    self._merge_executor,
+                    self._fold_states,
+                    [message for message, _ in batch],
+                )
+                # a malformed payload only costs its own message: the rest
+                # of the batch is merged and acked without it
+                applied = []
+                for (message, addr), failure in zip(batch, failures):
+                    if failure is None:
+                        applied.append((message, addr))
+                    else:
+                        self._reject_payload(message, failure)
+                if applied:
+                    self._apply_remote(remote, [message for message, _ in applied])
+                    self.stats.merge_batches += 1
+                for message, addr in applied:
+                    self._send_ack(message, addr)
+            except Exception as e:
+                self.stats.errors += 1
+                log.debug("merge_error", error=str(e))
+
+    @staticmethod
+    def _fold_states(messages):
+        """Decode state_sync/delta payloads into one combined NodeState.
+
+        CRDT merge is associative and idempotent, so folding a batch into a
+        single group first and merging that once gives the same result as
+        merging every message separately, with one merkle rebuild instead of
+        one per message. Touches no shared state, so it is safe off-loop.
+
+        Returns (group, failures): failures lines up with messages and holds
+        None for each message folded in, or the error that made it unusable.
+        group is None when no message could be decoded.
+        """
+        group = None
+        failures = []
+        for message in messages:
+            try:
+                key = "state" if message["type"] == "state_sync" else "delta"
+                remote = NodeState.from_dict(message[key])
+                if group is None:
+                    group = remote
+                else:
+                    group.merge(remote)
+                    # one partial repair in the batch makes the whole group
+                    # partial, so merging it cannot advance our vector
+                    group.partial = group.partial or remote.partial
+            except Exception as e:
+                failures.append(str(e) or type(e).__name__)
+            else:
+                failures.append(None)
+        return group, failures
+
+    def _reject_payload(self, message, error):
+        """Count and log a message whose payload could not be used."""
+        self.stats.errors += 1
+        self.stats.payloads_rejected += 1
+        log.debug(
+            "gossip_payload_rejected",
+            sender=message.get("sender", "unknown"),
+            type=message.get("type"),
+            error=error,
+        )
+
+    def _apply_remote(self, remote, messages):
+        """Merge a folded remote state into ours and record the outcome."""
+        old_root = self.state.merkle_root()
+        started_ns = time.monotonic_ns()
+        new_root = self.state.merge(remote)
+        elapsed_ns = time.monotonic_ns() - started_ns
+        self.stats.last_merge_ns = elapsed_ns
+        self.stats.merge_time_ns_total += elapsed_ns
+
+        if old_root == new_root:
+            self.stats.redundant_received += len(messages)
+        else:
+            self.stats.merged += 1
+            self.stats.last_successful_merge_at_ns = time.time_ns()
+            log.info(
+                "gossip_merged",
+                from_node=",".join(
+                    sorted({m.get("sender", "unknown") for m in messages})
+                ),
+                reason=messages[-1].get("reason", "unknown"),
+                batch=len(messages),
+                old_root=old_root[:12],
+                new_root=new_root[:12],
+            )
+
+    async def _peer_addr(self, peer):
+        """Numeric (ip, port) for a peer, so sendto skips name resolution."""
+        cached = self._peer_addrs.get(peer)
+        if cached and time.monotonic() - cached[1] < PEER_ADDR_TTL:
+            return cached[0]
+        return await self._resolve_peer(peer)
+
+    async def _resolve_peer(self, peer):
+        host, port = self._parse_peer(peer)
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, port, family=socket.AF_INET, type=socket.SOCK_DGRAM
+        )
+        addr = infos[0][4][:2]
+        self._peer_addrs[peer] = (addr, time.monotonic())
+        return addr
 
     def _parse_peer(self, peer):
         parts = peer.rsplit(":", 1)
         return parts[0], int(parts[1]) if len(parts) > 1 else 9000
 
     def get_stats(self):
-        stats = dict(self.stats)
-        merged = stats.get("merged", 0)
-        total_merge_ms = stats.get("merge_time_ms_total", 0.0)
-        stats["avg_merge_ms"] = round(total_merge_ms / merged, 3) if merged else 0.0
+        stats = asdict(self.stats)
+        merged = stats["merged"]
+        total_ns = stats.pop("merge_time_ns_total")
+        stats["merge_time_ms_total"] = total_ns / 1e6
+        stats["last_merge_ms"] = round(stats.pop("last_merge_ns") / 1e6, 3)
+        for field in ("last_message_at", "last_successful_merge_at"):
+            ns = stats.pop(f"{field}_ns")
+            stats[field] = ns / 1e9 if ns is not None else None
+        stats["avg_merge_ms"] = round(total_ns / 1e6 / merged, 3) if merged else 0.0
+        stats["peer_rtt_ms"] = {
+            peer: round(rtt * 1000, 3) for peer, rtt in self._peer_rtt.items()
+        }
         return stats
@@ -1,8 +1,11 @@
+import msgpack
+import orjson
 import structlog
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from ..config import Config
 from ..models import Event, NodeStatus
@@ -11,6 +14,28 @@ from ..hash_chain import HashChainLog
 
 log = structlog.get_logger()
 
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson instead of the stdlib encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def _state_response(request: Request, payload):
+    """Render a state-shaped payload: msgpack for peers that ask, else JSON."""
+    # peers merging over HTTP ask for msgpack; browsers and curl get JSON
+    if MSGPACK_MEDIA_TYPE in request.headers.get("accept", ""):
+        return Response(
+            msgpack.packb(payload, use_bin_type=True), media_type=MSGPACK_MEDIA_TYPE
+        )
+    # hot polling endpoints return an ORJSONResponse directly, which
+    # skips FastAPI's jsonable_encoder walk over the payload
+    return ORJSONResponse(payload)
+
 
 class IntakeService:
     """HTTP API for receiving events and querying state."""
@@ -23,7 +48,10 @@ class IntakeService:
         self.app = self._build_app()
 
     def _build_app(self):
-        app = FastAPI(title=f"Edge Node {self.config.node_id}")
+        app = FastAPI(
+            title=f"Edge Node {self.config.node_id}",
+            default_response_class=ORJSONResponse,
+        )
 
         @app.get("/")
         async def root():
@@ -41,25 +69,7 @@ class IntakeService:
             which counter, register, pn_counter, or set key was used.
             """
             try:
-                entry = self.chain.append(
-                    event.id, event.type, event.model_dump(mode="json")
-                )
-
-                # build the data dict from the event fields + metadata
-                event_data = {
-                    "value": event.value,
-                    "location": event.location,
-                    **event.metadata,
-                }
-
-                # route to correct CRDT based on category
-                stored_in = self.state.record_event(
-                    event.id,
-                    event.type,
-                    event_data,
-                    category=event.category.value,
-                    operation=event.operation,
-                )
+                entry, stored_in = self._ingest(event)
 
                 log.info(
                     "event_received",
@@ -69,60 +79,139 @@ class IntakeService:
                     stored_in=stored_in,
                 )
 
-                return {
-                    "status": "accepted",
-                    "event_id": event.id,
-                    "category": event.category.value,
-                    "log_sequence": entry["sequence"],
-                    "version": self.state.version,
-                    "stored_in": stored_in,
-                }
+                # plain str/int payload: render it directly and skip FastAPI's
+                # jsonable_encoder pass, as the hot read endpoints do
+                return ORJSONResponse(
+                    {
+                        "status": "accepted",
+                        "event_id": event.id,
+                        "category": event.category.value,
+                        "log_sequence": entry["sequence"],
+                        "version": self.state.version,
+                        "stored_in": stored_in,
+                    }
+                )
             except Exception as e:
                 log.error("event_failed", error=str(e))
                 raise HTTPException(status_code=500, detail=str(e))
 
         @app.get("/state")
-        async def get_state():
-            return self.state.to_dict()
+        async def get_state(request: Request):
+            return _state_response(request, self.state.to_dict())
 
         @app.get("/state/merkle")
         async def get_merkle():
+            return ORJSONResponse(
+                {
+                    "node_id": self.config.node_id,
+                    "merkle_root": self.state.merkle_root(),
+                    "version": self.state.version,
+                    "vv": self.state.version_vector(),
+                }
+            )
+
+        @app.get("/state/delta")
+        async def get_delta(request: Request, vv: str = "{}"):
+            """Writes newer than the JSON version vector `vv`, in state shape."""
+            try:
+                known = orjson.loads(vv)
+            except orjson.JSONDecodeError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if not isinstance(known, dict):
+                raise HTTPException(status_code=400, detail="vv must be an object")
+            return _state_response(request, self.state.delta_since(known))
+
+        @app.get("/state/subtree")
+        async def get_subtree_roots():
+            """Per-CRDT-type subtree roots; descend only into the ones that differ."""
+            return ORJSONResponse(
+                {
+                    "node_id": self.config.node_id,
+                    "version": self.state.version,
+                    "merkle_root": self.state.merkle_root(),
+                    "subtrees": self.state.subtree_roots(),
+                }
+            )
+
+        @app.get("/state/subtree/{prefix:path}")
+        async def get_subtree(prefix: str):
             return {
                 "node_id": self.config.node_id,
-                "merkle_root": self.state.merkle_root(),
                 "version": self.state.version,
+                "prefix": prefix,
+                "root": self.state.subtree_root(prefix),
+                "leaves": self.state.subtree_keys(prefix),
             }
 
-        @app.get("/status")
+        @app.get("/state/leaves")
+        async def get_leaves(request: Request, keys: List[str] = Query(default=[])):
+            """Partial state holding only the requested merkle leaves."""
+            return _state_response(request, self.state.leaves_dict(keys))
+
+        @app.get("/status", response_model=NodeStatus)
         async def get_status():
+            # NodeStatus documents the shape; the dict is built directly so
+            # each scrape skips model construction and validation
             uptime = (datetime.utcnow() - self.start_time).total_seconds()
-            return NodeStatus(
-                node_id=self.config.node_id,
-                version=self.state.version,
-                merkle_root=self.state.merkle_root(),
-                peer_count=len(self.config.peers),
-                event_count=self.state.get_event_count(),
-                uptime_seconds=uptime,
-            ).model_dump()
+            return ORJSONResponse(
+                {
+                    "node_id": self.config.node_id,
+                    "version": self.state.version,
+                    "merkle_root": self.state.merkle_root(),
+                    "peer_count": len(self.config.peers),
+                    "event_count": self.state.get_event_count(),
+                    "uptime_seconds": uptime,
+                }
+            )
 
         @app.get("/log")
-        async def get_log(since: int = 0, limit: int = 100):
-            entries = self.chain.get_entries(since)[:limit]
-            return {
-                "entries": entries,
-                "total": len(self.chain.entries),
-                "valid": self.chain.verify(),
-                "latest_hash": self.chain.latest_hash(),
+        async def get_log(request: Request, since: int = 0, limit: int = 100):
+            """Page through the hash chain; pass X-Next-Cursor back as `since`.
+
+            Clients that accept application/x-ndjson get one entry per line,
+            streamed, with the chain metadata in headers.
+            """
+            since = max(since, 0)
+            entries = self.chain.get_entries(since, max(limit, 0))
+            next_cursor = since + len(entries)
+            total = len(self.chain.entries)
+            valid = self.chain.verify_cached()
+            latest_hash = self.chain.latest_hash()
+            headers = {
+                "X-Next-Cursor": str(next_cursor),
+                "X-Total": str(total),
+                "X-Chain-Valid": "true" if valid else "false",
+                "X-Latest-Hash": latest_hash,
             }
 
+            if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+
+                def lines():
+                    for entry in entries:
+                        yield orjson.dumps(entry) + b"\n"
+
+                return StreamingResponse(
+                    lines(), media_type=NDJSON_MEDIA_TYPE, headers=headers
+                )
+
+            return ORJSONResponse(
+                {
+                    "entries": entries,
+                    "total": total,
+                    "valid": valid,
+                    "latest_hash": latest_hash,
+                    "next_cursor": next_cursor,
+                },
+                headers=headers,
+            )
+
         @app.post("/merge")
         async def merge_state(remote_state: Dict[str, Any]):
             """Merge a remote node's state into ours."""
             try:
                 incoming = NodeState.from_dict(remote_state)
                 old_root = self.state.merkle_root()
-                self.state.merge(incoming)
-                new_root = self.state.merkle_root()
+                new_root = self.state.merge(incoming)
                 log.info(
                     "state_merged",
                     from_node=remote_state.get("node_id"),
@@ -139,3 +228,28 @@ class IntakeService:
                 raise HTTPException(status_code=400, detail=str(e))
 
         return app
+
+    def _ingest(self, event: Event):
+        """Append an event to the hash chain and route it into CRDT state.
+
+        Both writes are fed from a single model_dump of the event, and
+        neither awaits, so no other request can land between them.
+        Returns (chain entry, stored_in).
+        """
+        payload = event.model_dump(mode="json")
+        entry = self.chain.append(event.id, event.type, payload)
+
+        # CRDT data is the event fields + metadata, routed by category
+        event_data = {
+            "value": payload["value"],
+            "location": payload["location"],
+            **payload["metadata"],
+        }
+        stored_in = self.state.record_event(
+            event.id,
+            event.type,
+            event_data,
+            category=payload["category"],
+            operation=payload["operation"],
+        )
+        return entry, stored_in
@@ -3,6 +3,9 @@ from datetime import datetime
 import uuid
 import aiohttp
 
+# upper bound on event submissions in flight during a bootstrap scenario
+MAX_CONCURRENT_SENDS = 32
+
 
 async def run_split_brain_then_heal(
     docker_manager,
@@ -97,26 +100,36 @@ async def run_bootstrap_events_convergence(
             "create_failures": create_failures,
         }
 
+    # one pooled session for readiness probes and event sends, so repeated
+    # requests to a node reuse a kept-alive connection instead of reconnecting
+    session = None
+    if event_sender is None:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100, keepalive_timeout=30, ttl_dns_cache=300
+            )
+        )
+
     async def _default_sender(node_url, payload):
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=5)
-        ) as session:
-            async with session.post(f"{node_url}/event", json=payload) as response:
-                body = await response.json()
-                return {
-                    "ok": response.status < 400,
-                    "status_code": response.status,
-                    "body": body,
-                }
+        async with session.post(
+            f"{node_url}/event", json=payload, timeout=aiohttp.ClientTimeout(total=5)
+        ) as response:
+            body = await response.json()
+            return {
+                "ok": response.status < 400,
+                "status_code": response.status,
+                "body": body,
+            }
 
     async def _wait_for_node_ready(node_url, attempts=10, delay_seconds=0.4):
         timeout = aiohttp.ClientTimeout(total=3)
         for attempt in range(max(int(attempts), 1)):
             try:
-                async with aiohttp.ClientSession(timeout=timeout) as session:
-                    async with session.get(f"{node_url}/state/merkle") as response:
-                        if response.status < 400:
-                            return True
+                async with session.get(
+                    f"{node_url}/state/merkle", timeout=timeout
+                ) as response:
+                    if response.status < 400:
+                        return True
             except Exception:
                 pass
 
@@ -127,73 +140,78 @@ async def run_bootstrap_events_convergence(
 
     sender = event_sender or _default_sender
 
-    if event_sender is None:
-        readiness = []
-        for node in targets:
-            node_url = node.get("internal_url") or node.get("url")
-            node_id = node.get("node_id", node.get("name", "unknown"))
-            is_ready = await _wait_for_node_ready(node_url)
-            readiness.append({"node_id": node_id, "node_url": node_url, "ready": is_ready})
-
-        not_ready = [entry for entry in readiness if not entry["ready"]]
-        if not_ready:
-            await asyncio.sleep(0.5)
-
-    send_results = []
-    sample_types = [
-        ("water_level", "sensor", "bridge_north", 3.2),
-        ("shelter_occupancy", "resource", "shelter_east", 12),
-        ("road_status", "infrastructure", "highway_101", "blocked"),
-    ]
-
-    for idx, node in enumerate(targets):
-        node_url = node.get("internal_url") or node.get("url")
-        node_id = node.get("node_id", node.get("name", "unknown"))
-        for event_idx in range(max(int(events_per_node), 1)):
-            event_type, category, location, value = sample_types[
-                (idx + event_idx) % len(sample_types)
-            ]
-            payload = {
-                "type": event_type,
-                "value": value,
-                "location": location,
-                "category": category,
-                "metadata": {
-                    "source": "scenario_bootstrap",
-                    "scenario_action_id": action_id,
-                },
-            }
-
-            if category == "resource":
-                payload["operation"] = "increment"
-            if category == "infrastructure":
-                payload["operation"] = "add"
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
 
+    async def _send_one(node_id, node_url, event_type, category, payload):
+        result = {
+            "node_id": node_id,
+            "node_url": node_url,
+            "event_type": event_type,
+            "category": category,
+        }
+        async with semaphore:
             try:
                 response = await sender(node_url, payload)
-                send_results.append(
-                    {
-                        "node_id": node_id,
-                        "node_url": node_url,
-                        "event_type": event_type,
-                        "category": category,
-                        "ok": bool(response.get("ok")),
-                        "status_code": response.get("status_code"),
-                    }
-                )
+                result["ok"] = bool(response.get("ok"))
+                result["status_code"] = response.get("status_code")
             except Exception as error:
-                send_results.append(
-                    {
-                        "node_id": node_id,
-                        "node_url": node_url,
-                        "event_type": event_type,
-                        "category": category,
-                        "ok": False,
-                        "status_code": None,
-                        "error": str(error),
-                    }
+                result["ok"] = False
+                result["status_code"] = None
+                result["error"] = str(error)
+        return result
+
+    try:
+        if event_sender is None:
+            readiness = await asyncio.gather(
+                *[
+                    _wait_for_node_ready(node.get("internal_url") or node.get("url"))
+                    for node in targets
+                ]
+            )
+            if not all(readiness):
+                await asyncio.sleep(0.5)
+
+        sample_types = [
+            ("water_level", "sensor", "bridge_north", 3.2),
+            ("shelter_occupancy", "resource", "shelter_east", 12),
+            ("road_status", "infrastructure", "highway_101", "blocked"),
+        ]
+
+        sends = []
+        for idx, node in enumerate(targets):
+            node_url = node.get("internal_url") or node.get("url")
+            node_id = node.get("node_id", node.get("name", "unknown"))
+            for event_idx in range(max(int(events_per_node), 1)):
+                event_type, category, location, value = sample_types[
+                    (idx + event_idx) % len(sample_types)
+                ]
+                payload = {
+                    "type": event_type,
+                    "value": value,
+                    "location": location,
+                    "category": category,
+                    "metadata": {
+                        "source": "scenario_bootstrap",
+                        "scenario_action_id": action_id,
+                    },
+                }
+
+                if category == "resource":
+                    payload["operation"] = "increment"
+                if category == "infrastructure":
+                    payload["operation"] = "add"
+
+                sends.append(
+                    _send_one(node_id, node_url, event_type, category, payload)
                 )
 
+        # all sends are in flight together, bounded by the semaphore;
+        # gather keeps results in submission order
+        send_results = list(await asyncio.gather(*sends))
+    finally:
+        if session is not None:
+            await session.close()
+
     polls = max(int(verify_polls), 1)
     verification_states = []
     for _ in range(polls):
@@ -4,12 +4,19 @@ Automatically discovers gateways and edge nodes via Docker (no registry).
 """
 
 import asyncio
+import concurrent.futures
+import functools
 import logging
 import os
+import re
 import signal
+import time
+from contextlib import asynccontextmanager
 from typing import Optional
 
 import aiohttp
+import docker
+import orjson
 import structlog
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
@@ -38,7 +45,62 @@ structlog.configure(
 )
 
 log = structlog.get_logger()
-app = FastAPI(title="Edge Mesh Simulator")
+
+# upper bound on containers started at once by POST /nodes/batch
+MAX_CONCURRENT_CREATES = 4
+
+# threads serving blocking Docker calls; they all share one daemon socket
+DOCKER_WORKERS = 4
+
+# gateway error bodies are only logged or echoed back, so keep the start
+MAX_ERROR_BODY = 2048
+
+# failures we expect from Docker calls (the SDK's own errors, socket and
+# requests errors, which are OSErrors, and DockerManager's RuntimeErrors) and
+# from gateway HTTP calls; anything else is a bug and propagates
+DOCKER_ERRORS = (docker.errors.DockerException, OSError, RuntimeError)
+GATEWAY_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+# keep-alive session shared by every gateway call; created on first use
+_http: Optional[aiohttp.ClientSession] = None
+
+
+def _http_session() -> aiohttp.ClientSession:
+    global _http
+    if _http is None or _http.closed:
+        _http = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=64, limit_per_host=16, keepalive_timeout=30
+            ),
+            timeout=aiohttp.ClientTimeout(total=8),
+        )
+    return _http
+
+
+# dedicated pool so Docker calls neither pile onto nor starve the default
+# executor
+_docker_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+
+def _docker_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _docker_pool
+    if _docker_pool is None:
+        _docker_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=DOCKER_WORKERS, thread_name_prefix="docker"
+        )
+    return _docker_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if _http is not None:
+        await _http.close()
+    if _docker_pool is not None:
+        _docker_pool.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="Edge Mesh Simulator", lifespan=lifespan)
 
 
 try:
@@ -54,16 +116,130 @@ class RemoteGatewayService:
     def __init__(self):
         self.is_divergent = False
         self.poll_count = 0
+        # last gateway polled; kept across scenarios and only rediscovered
+        # when it stops answering
+        self._primary = None
+        self._needs_sync = True
+
+    def reset(self):
+        """Resync gateways on the next poll; call before each scenario run."""
+        self._needs_sync = True
 
     async def poll_once(self):
-        status = await _proxy_gateway_request("POST", "/gateway/poll")
+        if self._needs_sync:
+            # first poll of a scenario: containers changed since the last
+            # listing, so sync gateways once from a fresh one
+            discovery_cache.invalidate()
+            await _sync_gateways_with_nodes(force=True)
+            self._needs_sync = False
+        if self._primary is None:
+            self._primary = (await _discover_gateways())[0]
+        try:
+            status = await self._poll_primary()
+        except HTTPException as error:
+            if error.detail.get("code") != "GATEWAY_UNREACHABLE":
+                raise
+            # the gateway went away; find the current one and try once more
+            discovery_cache.invalidate()
+            self._primary = (await _discover_gateways())[0]
+            status = await self._poll_primary()
+        gateway_cache.invalidate()
         self.is_divergent = bool(status.get("is_divergent", False))
         self.poll_count = int(status.get("poll_count", self.poll_count + 1))
 
+    async def _poll_primary(self):
+        return await _forward_gateway_request(self._primary, "POST", "/gateway/poll")
+
 
 remote_gateway = RemoteGatewayService()
 
 
+async def _run_docker(fn, *args):
+    """Run a blocking Docker call on the Docker thread pool.
+
+    Unlike asyncio.to_thread this skips copying the context for every call;
+    nothing here relies on contextvars inside Docker calls.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _docker_executor(), functools.partial(fn, *args) if args else fn
+    )
+
+
+class _DiscoveryCache:
+    """Short-lived cache of Docker container listings.
+
+    Listing containers costs hundreds of milliseconds, and dashboard polling
+    asks for the same lists many times a second. Entries live for `ttl`
+    seconds and are dropped by every handler that changes the topology.
+    """
+
+    def __init__(self, ttl: float = 3.0):
+        self.ttl = ttl
+        self._entries = {}
+        # one lock per listing, so node and gateway lookups run side by side
+        self._locks = {}
+
+    async def get(self, name, fetch):
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            cached = self._entries.get(name)
+            if cached and time.monotonic() < cached[1]:
+                return cached[0]
+            value = await _run_docker(fetch)
+            self._entries[name] = (value, time.monotonic() + self.ttl)
+            return value
+
+    def invalidate(self):
+        self._entries.clear()
+
+
+discovery_cache = _DiscoveryCache()
+
+
+class _GatewayResponseCache:
+    """Gateway GET responses kept for `ttl` seconds.
+
+    The gateway's data only moves once per poll, so dashboards refreshing
+    every second can share one upstream request. Concurrent misses for the
+    same key wait on that one request instead of each issuing their own.
+    """
+
+    def __init__(self, ttl: float = 1.0):
+        self.ttl = ttl
+        self._entries = {}
+        self._locks = {}
+
+    async def get(self, key, fetch):
+        cached = self._entries.get(key)
+        if cached and time.monotonic() < cached[1]:
+            return cached[0]
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            cached = self._entries.get(key)
+            if cached and time.monotonic() < cached[1]:
+                return cached[0]
+            value = await fetch()
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            return value
+
+    def invalidate(self):
+        self._entries.clear()
+
+
+gateway_cache = _GatewayResponseCache()
+
+# bumped whenever nodes are created or removed; gateways are only re-synced
+# when it moves past the version they last received
+_topology_version = 0
+_synced_version = -1
+
+
+def _topology_changed():
+    global _topology_version
+    _topology_version += 1
+    discovery_cache.invalidate()
+    gateway_cache.invalidate()
+
+
 def _api_error(
     status_code: int,
     code: str,
@@ -113,17 +289,30 @@ def _require_docker():
         raise _api_error(503, "DOCKER_UNAVAILABLE", "Docker not available")
 
 
+async def _error_body(response: aiohttp.ClientResponse) -> str:
+    body = await response.content.read(MAX_ERROR_BODY)
+    return body.decode("utf-8", errors="replace")
+
+
 async def _discover_gateways():
     _require_docker()
-    gateways = await asyncio.to_thread(docker_mgr.list_gateways)
+    gateways = await discovery_cache.get("gateways", docker_mgr.list_gateways)
     if not gateways:
         raise _api_error(503, "NO_GATEWAY", "No running gateway containers discovered")
     return gateways
 
 
-async def _sync_gateways_with_nodes():
+async def _sync_gateways_with_nodes(force: bool = False):
+    global _synced_version
     _require_docker()
-    nodes = await asyncio.to_thread(docker_mgr.list_nodes)
+    version = _topology_version
+    if not force and version == _synced_version:
+        return
+
+    # two independent Docker listings; fetch them together
+    nodes, gateways = await asyncio.gather(
+        discovery_cache.get("nodes", docker_mgr.list_nodes), _discover_gateways()
+    )
     payload = {
         "nodes": [
             {
@@ -135,78 +324,103 @@ async def _sync_gateways_with_nodes():
         ]
     }
 
-    gateways = await _discover_gateways()
-
+    session = _http_session()
     timeout = aiohttp.ClientTimeout(total=6)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        for gateway in gateways:
-            url = f"{gateway['url']}/gateway/nodes/sync"
-            try:
-                async with session.post(url, json=payload) as response:
-                    if response.status >= 400:
-                        body = await response.text()
-                        log.warning(
-                            "gateway_sync_failed",
-                            gateway=gateway["name"],
-                            status=response.status,
-                            body=body,
-                        )
-            except Exception as error:
-                log.warning(
-                    "gateway_sync_exception",
-                    gateway=gateway["name"],
-                    error=str(error),
-                )
 
+    async def _post_sync(gateway):
+        url = f"{gateway['url']}/gateway/nodes/sync"
+        response = await session.post(url, json=payload, timeout=timeout)
+        try:
+            if response.status >= 400:
+                return response.status, await _error_body(response)
+            return response.status, None
+        finally:
+            # only the status matters; the echoed node list is never read
+            response.release()
+
+    # gateways are independent, so the sync costs one round trip, not N
+    results = await asyncio.gather(
+        *[_post_sync(gateway) for gateway in gateways], return_exceptions=True
+    )
 
-async def _proxy_gateway_request(method: str, path: str, params: Optional[dict] = None):
-    await _sync_gateways_with_nodes()
+    synced = True
+    for gateway, result in zip(gateways, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, GATEWAY_ERRORS):
+                raise result
+            synced = False
+            log.warning(
+                "gateway_sync_exception",
+                gateway=gateway["name"],
+                error=str(result),
+            )
+        elif result[1] is not None:
+            synced = False
+            log.warning(
+                "gateway_sync_failed",
+                gateway=gateway["name"],
+                status=result[0],
+                body=result[1],
+            )
+
+    # a failed gateway is retried on the next call
+    if synced:
+        _synced_version = version
+
+
+async def _proxy_gateway_request(
+    method: str, path: str, params: Optional[dict] = None, sync: bool = False
+):
+    await _sync_gateways_with_nodes(force=sync)
     gateways = await _discover_gateways()
-    primary = gateways[0]
+    return await _forward_gateway_request(gateways[0], method, path, params)
 
-    timeout = aiohttp.ClientTimeout(total=8)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        try:
-            async with session.request(
-                method,
-                f"{primary['url']}{path}",
-                params=params,
-            ) as response:
-                if response.status >= 400:
-                    body = await response.text()
-                    raise _api_error(
-                        response.status,
-                        "GATEWAY_REQUEST_FAILED",
-                        f"Gateway request failed for {path}",
-                        {"gateway": primary["name"], "body": body},
-                    )
-                return await response.json()
-        except HTTPException:
-            raise
-        except Exception as error:
-            raise _api_error(
-                503,
-                "GATEWAY_UNREACHABLE",
-                "Unable to reach discovered gateway",
-                {"gateway": primary["name"], "error": str(error)},
-            )
+
+async def _forward_gateway_request(
+    primary: dict, method: str, path: str, params: Optional[dict] = None
+):
+    try:
+        async with _http_session().request(
+            method,
+            f"{primary['url']}{path}",
+            params=params,
+        ) as response:
+            if response.status >= 400:
+                body = await _error_body(response)
+                raise _api_error(
+                    response.status,
+                    "GATEWAY_REQUEST_FAILED",
+                    f"Gateway request failed for {path}",
+                    {"gateway": primary["name"], "body": body},
+                )
+            return await response.json(loads=orjson.loads)
+    except (*GATEWAY_ERRORS, ValueError) as error:
+        # ValueError: a 2xx body that is not valid JSON (orjson's decode
+        # error subclasses it)
+        raise _api_error(
+            503,
+            "GATEWAY_UNREACHABLE",
+            "Unable to reach discovered gateway",
+            {"gateway": primary["name"], "error": str(error)},
+        )
 
 
 @app.get("/nodes")
 async def list_nodes():
     _require_docker()
-    return await asyncio.to_thread(docker_mgr.list_nodes)
+    return await discovery_cache.get("nodes", docker_mgr.list_nodes)
 
 
 @app.post("/nodes")
 async def create_node(node_id: Optional[str] = None):
     _require_docker()
     try:
-        result = await asyncio.to_thread(docker_mgr.create_node, node_id)
-        await _sync_gateways_with_nodes()
-        return result
-    except Exception as error:
+        result = await _run_docker(docker_mgr.create_node, node_id)
+    except DOCKER_ERRORS as error:
         raise _api_error(500, "NODE_CREATE_FAILED", "Failed to create node", str(error))
+    _topology_changed()
+    await _sync_gateways_with_nodes()
+    return result
 
 
 @app.post("/nodes/batch")
@@ -215,15 +429,28 @@ async def create_nodes_batch(count: int = 1):
     if count < 1 or count > 20:
         raise _api_error(400, "INVALID_COUNT", "count must be between 1 and 20")
 
+    # each create is an independent Docker call; a few at a time keeps the
+    # daemon responsive while cutting batch latency
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CREATES)
+
+    async def _create_one():
+        async with semaphore:
+            return await _run_docker(docker_mgr.create_node)
+
+    results = await asyncio.gather(
+        *[_create_one() for _ in range(count)], return_exceptions=True
+    )
     created = []
     failed = []
-    for _ in range(count):
-        try:
-            result = await asyncio.to_thread(docker_mgr.create_node)
+    for result in results:
+        if isinstance(result, DOCKER_ERRORS):
+            failed.append(str(result))
+        elif isinstance(result, BaseException):
+            raise result
+        else:
             created.append(result)
-        except Exception as error:
-            failed.append(str(error))
 
+    _topology_changed()
     await _sync_gateways_with_nodes()
 
     status = "completed" if not failed else "partial"
@@ -241,7 +468,8 @@ async def create_nodes_batch(count: int = 1):
 @app.delete("/nodes/{node_id}")
 async def remove_node(node_id: str):
     _require_docker()
-    result = await asyncio.to_thread(docker_mgr.remove_node, node_id)
+    result = await _run_docker(docker_mgr.remove_node, node_id)
+    _topology_changed()
     await _sync_gateways_with_nodes()
     return result
 
@@ -249,25 +477,33 @@ async def remove_node(node_id: str):
 @app.post("/nodes/{node_id}/partition")
 async def isolate_node(node_id: str):
     _require_docker()
-    return await asyncio.to_thread(docker_mgr.isolate_node, node_id)
+    result = await _run_docker(docker_mgr.isolate_node, node_id)
+    discovery_cache.invalidate()
+    return result
 
 
 @app.delete("/nodes/{node_id}/partition")
 async def heal_node(node_id: str):
     _require_docker()
-    return await asyncio.to_thread(docker_mgr.heal_node, node_id)
+    result = await _run_docker(docker_mgr.heal_node, node_id)
+    discovery_cache.invalidate()
+    return result
 
 
 @app.post("/partition/split-brain")
 async def split_brain():
     _require_docker()
-    return await asyncio.to_thread(docker_mgr.create_split_brain)
+    result = await _run_docker(docker_mgr.create_split_brain)
+    discovery_cache.invalidate()
+    return result
 
 
 @app.post("/partition/heal-all")
 async def heal_all():
     _require_docker()
-    return await asyncio.to_thread(docker_mgr.heal_all)
+    result = await _run_docker(docker_mgr.heal_all)
+    discovery_cache.invalidate()
+    return result
 
 
 @app.post("/scenarios/split-brain-heal")
@@ -285,12 +521,16 @@ async def scenario_split_brain_heal(
             "verify_polls must be between 1 and 20",
         )
 
-    return await run_split_brain_then_heal(
-        docker_manager=docker_mgr,
-        gateway_service=remote_gateway,
-        isolate_seconds=isolate_seconds,
-        verify_polls=verify_polls,
-    )
+    remote_gateway.reset()
+    try:
+        return await run_split_brain_then_heal(
+            docker_manager=docker_mgr,
+            gateway_service=remote_gateway,
+            isolate_seconds=isolate_seconds,
+            verify_polls=verify_polls,
+        )
+    finally:
+        discovery_cache.invalidate()
 
 
 @app.post("/scenarios/bootstrap-converge")
@@ -315,29 +555,39 @@ async def scenario_bootstrap_converge(
             "verify_polls must be between 1 and 20",
         )
 
-    return await run_bootstrap_events_convergence(
-        docker_manager=docker_mgr,
-        gateway_service=remote_gateway,
-        create_nodes=create_nodes,
-        events_per_node=events_per_node,
-        verify_polls=verify_polls,
+    remote_gateway.reset()
+    try:
+        return await run_bootstrap_events_convergence(
+            docker_manager=docker_mgr,
+            gateway_service=remote_gateway,
+            create_nodes=create_nodes,
+            events_per_node=events_per_node,
+            verify_polls=verify_polls,
+        )
+    finally:
+        discovery_cache.invalidate()
+
+
+async def _cached_gateway_get(path: str, params: Optional[dict] = None):
+    key = (path, tuple(sorted((params or {}).items())))
+    return await gateway_cache.get(
+        key, lambda: _proxy_gateway_request("GET", path, params)
     )
 
 
 @app.get("/gateway/status")
 async def gateway_status():
-    return await _proxy_gateway_request("GET", "/gateway/status")
+    return await _cached_gateway_get("/gateway/status")
 
 
 @app.get("/gateway/divergence")
 async def gateway_divergence():
-    return await _proxy_gateway_request("GET", "/gateway/divergence")
+    return await _cached_gateway_get("/gateway/divergence")
 
 
 @app.get("/gateway/metrics")
 async def gateway_metrics(name: Optional[str] = None, limit: int = 100):
-    return await _proxy_gateway_request(
-        "GET",
+    return await _cached_gateway_get(
         "/gateway/metrics",
         params={"name": name, "limit": limit},
     )
@@ -345,16 +595,50 @@ async def gateway_metrics(name: Optional[str] = None, limit: int = 100):
 
 @app.get("/gateway/runtime-metrics")
 async def gateway_runtime_metrics():
-    return await _proxy_gateway_request("GET", "/gateway/runtime-metrics")
+    return await _cached_gateway_get("/gateway/runtime-metrics")
 
 
 @app.post("/gateway/poll")
 async def trigger_gateway_poll():
-    return await _proxy_gateway_request("POST", "/gateway/poll")
+    status = await _proxy_gateway_request("POST", "/gateway/poll", sync=True)
+    gateway_cache.invalidate()
+    return status
+
+
+@app.get("/health")
+async def health():
+    # no Docker or gateway I/O, so probes stay cheap
+    return {"status": "ok"}
+
+
+# fingerprinted names like app.3f9a1c2e.js
+_HASHED_ASSET = re.compile(r"\.[0-9a-f]{8,}\.\w+$")
+
+
+class _CachedStaticFiles(StaticFiles):
+    """StaticFiles with explicit Cache-Control headers.
+
+    Fingerprinted assets never change and are cached for a year. Pages are
+    always revalidated against the ETag Starlette already sends, and other
+    assets are reused for a few minutes, so open dashboards stop refetching
+    them on every reload.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        name = os.path.basename(full_path)
+        if _HASHED_ASSET.search(name):
+            cache_control = "public, max-age=31536000, immutable"
+        elif name.endswith(".html"):
+            cache_control = "no-cache"
+        else:
+            cache_control = "public, max-age=300"
+        response.headers["Cache-Control"] = cache_control
+        return response
 
 
 static_dir = os.path.join(os.path.dirname(__file__), "static")
-app.mount("/", StaticFiles(directory=static_dir, html=True), name="static")
+app.mount("/", _CachedStaticFiles(directory=static_dir, html=True), name="static")
 
 
 async def main():
@@ -1,20 +1,91 @@
-import json
 import sqlite3
 import os
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
+
+import orjson
+import structlog
+
+log = structlog.get_logger()
+
+FLUSH_INTERVAL = 0.1  # seconds a write may wait in the buffer
+FLUSH_ROWS = 256  # flush early once this many writes are buffered
+MAX_PENDING = 10000  # writers flush inline past this, instead of growing
+
+_second_prefix = (None, "")
+
+
+def _utc_timestamp():
+    """ISO-8601 UTC timestamp with microseconds, like utcnow().isoformat().
+
+    Rows are written many times per second, so the date-time prefix is
+    formatted once per second and only the fraction is built per call.
+    """
+    global _second_prefix
+    now = time.time()
+    second = int(now)
+    cached_second, prefix = _second_prefix
+    if second != cached_second:
+        prefix = datetime.fromtimestamp(second, timezone.utc).strftime(
+            "%Y-%m-%dT%H:%M:%S"
+        )
+        _second_prefix = (second, prefix)
+    return f"{prefix}.{int((now - second) * 1_000_000):06d}"
 
 
 class SQLiteStore:
-    """Simple SQLite storage for merged state snapshots and metrics."""
+    """
+    Simple SQLite storage for merged state snapshots and metrics.
+
+    Writes are buffered and committed by a background thread in one
+    transaction per flush, so a poll's worth of rows costs one fsync instead
+    of one per row. Reads flush first, so they always see earlier writes.
+    """
 
-    def __init__(self, db_path="/data/gateway.db"):
+    INSERT_SNAPSHOT = (
+        "INSERT INTO snapshots (timestamp, merkle_root, node_count, source_nodes, "
+        "state_json) VALUES (?, ?, ?, ?, ?)"
+    )
+    INSERT_DIVERGENCE = (
+        "INSERT INTO divergence_log (timestamp, is_divergent, merkle_roots_json) "
+        "VALUES (?, ?, ?)"
+    )
+    INSERT_METRIC = (
+        "INSERT INTO metrics (timestamp, name, value, metadata_json) "
+        "VALUES (?, ?, ?, ?)"
+    )
+
+    def __init__(self, db_path="/data/gateway.db", flush_interval=FLUSH_INTERVAL):
         os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # autocommit mode: flush() opens its own transaction, and reads do not
+        # leave an implicit one open
+        self.conn = sqlite3.connect(
+            db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256,
+        )
         self.conn.row_factory = sqlite3.Row
         self._init_tables()
 
+        self.flush_interval = flush_interval
+        self._conn_lock = threading.RLock()
+        self._pending = []  # (sql, params) in submission order
+        self._wakeup = threading.Condition()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_loop, name="sqlite-writer", daemon=True
+        )
+        self._writer.start()
+
     def _init_tables(self):
         self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA mmap_size=268435456;
+            PRAGMA cache_size=-65536;
             CREATE TABLE IF NOT EXISTS snapshots (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp TEXT NOT NULL,
@@ -36,25 +107,90 @@ class SQLiteStore:
                 value REAL NOT NULL,
                 metadata_json TEXT
             );
+            -- per-name reads walk this backwards instead of scanning and
+            -- sorting the table; id order is already the rowid order
+            CREATE INDEX IF NOT EXISTS idx_metrics_name_id ON metrics(name, id);
         """)
 
+    def _enqueue(self, sql, params):
+        with self._wakeup:
+            if self._closed:
+                raise RuntimeError("store is closed")
+            self._pending.append((sql, params))
+            pending = len(self._pending)
+            if pending >= FLUSH_ROWS:
+                self._wakeup.notify()
+        if pending >= MAX_PENDING:
+            # the writer is falling behind; make the caller wait for it
+            self.flush()
+
+    def _write_loop(self):
+        while True:
+            with self._wakeup:
+                if not self._closed and len(self._pending) < FLUSH_ROWS:
+                    self._wakeup.wait(self.flush_interval)
+                closed = self._closed
+            try:
+                self.flush()
+            except sqlite3.Error as error:
+                log.error("sqlite_flush_failed", error=str(error))
+            if closed:
+                return
+
+    def flush(self):
+        """Commit every buffered write in a single transaction."""
+        # holding the connection lock while taking the batch keeps batches
+        # committed in the order they were taken
+        with self._conn_lock:
+            with self._wakeup:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            grouped = {}
+            for sql, params in batch:
+                grouped.setdefault(sql, []).append(params)
+            self.conn.execute("BEGIN")
+            try:
+                for sql, rows in grouped.items():
+                    self.conn.executemany(sql, rows)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def close(self):
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join()
+        self.flush()
+        self.conn.close()
+
     def save_snapshot(self, merkle_root, node_count, source_nodes, state_dict):
-        self.conn.execute(
-            "INSERT INTO snapshots (timestamp, merkle_root, node_count, source_nodes, state_json) VALUES (?, ?, ?, ?, ?)",
+        self._enqueue(
+            self.INSERT_SNAPSHOT,
             (
-                datetime.utcnow().isoformat(),
+                _utc_timestamp(),
                 merkle_root,
                 node_count,
-                json.dumps(source_nodes),
-                json.dumps(state_dict),
+                orjson.dumps(source_nodes).decode(),
+                # decoded so the TEXT columns hold text, not BLOBs; rows an
+                # earlier build stored as bytes still load, orjson takes both
+                orjson.dumps(state_dict).decode(),
             ),
         )
-        self.conn.commit()
+
+    def _query(self, sql, params=()):
+        self.flush()
+        with self._conn_lock:
+            return self.conn.execute(sql, params).fetchall()
 
     def get_latest_snapshot(self):
-        row = self.conn.execute(
-            "SELECT * FROM snapshots ORDER BY id DESC LIMIT 1"
-        ).fetchone()
+        rows = self._query(
+            "SELECT id, timestamp, merkle_root, node_count, source_nodes, state_json "
+            "FROM snapshots ORDER BY id DESC LIMIT 1"
+        )
+        row = rows[0] if rows else None
         if not row:
             return None
         return {
@@ -62,65 +198,71 @@ class SQLiteStore:
             "timestamp": row["timestamp"],
             "merkle_root": row["merkle_root"],
             "node_count": row["node_count"],
-            "source_nodes": json.loads(row["source_nodes"]),
-            "state": json.loads(row["state_json"]),
+            "source_nodes": orjson.loads(row["source_nodes"]),
+            "state": orjson.loads(row["state_json"]),
         }
 
     def get_snapshot_history(self, limit=20):
-        rows = self.conn.execute(
+        """Snapshot summaries, newest first."""
+        rows = self._query(
             "SELECT id, timestamp, merkle_root, node_count, source_nodes FROM snapshots ORDER BY id DESC LIMIT ?",
             (limit,),
-        ).fetchall()
+        )
         return [dict(r) for r in rows]
 
     def log_divergence(self, is_divergent, merkle_roots):
-        self.conn.execute(
-            "INSERT INTO divergence_log (timestamp, is_divergent, merkle_roots_json) VALUES (?, ?, ?)",
+        self._enqueue(
+            self.INSERT_DIVERGENCE,
             (
-                datetime.utcnow().isoformat(),
+                _utc_timestamp(),
                 int(is_divergent),
-                json.dumps(merkle_roots),
+                orjson.dumps(merkle_roots).decode(),
             ),
         )
-        self.conn.commit()
 
     def get_divergence_log(self, limit=50):
-        rows = self.conn.execute(
-            "SELECT * FROM divergence_log ORDER BY id DESC LIMIT ?", (limit,)
-        ).fetchall()
+        """Divergence checks, newest first."""
+        rows = self._query(
+            "SELECT id, timestamp, is_divergent, merkle_roots_json FROM divergence_log "
+            "ORDER BY id DESC LIMIT ?",
+            (limit,),
+        )
         return [
             {
                 "id": r["id"],
                 "timestamp": r["timestamp"],
                 "is_divergent": bool(r["is_divergent"]),
-                "merkle_roots": json.loads(r["merkle_roots_json"]),
+                "merkle_roots": orjson.loads(r["merkle_roots_json"]),
             }
             for r in rows
         ]
 
     def save_metric(self, name, value, metadata=None):
-        self.conn.execute(
-            "INSERT INTO metrics (timestamp, name, value, metadata_json) VALUES (?, ?, ?, ?)",
-            (datetime.utcnow().isoformat(), name, value, json.dumps(metadata or {})),
+        self._enqueue(
+            self.INSERT_METRIC,
+            (_utc_timestamp(), name, value, orjson.dumps(metadata or {}).decode()),
         )
-        self.conn.commit()
 
     def get_metrics(self, name=None, limit=100):
+        """Metric samples, newest first, optionally for one name."""
         if name:
-            rows = self.conn.execute(
-                "SELECT * FROM metrics WHERE name = ? ORDER BY id DESC LIMIT ?",
+            rows = self._query(
+                "SELECT timestamp, name, value, metadata_json FROM metrics "
+                "WHERE name = ? ORDER BY id DESC LIMIT ?",
                 (name, limit),
-            ).fetchall()
+            )
         else:
-            rows = self.conn.execute(
-                "SELECT * FROM metrics ORDER BY id DESC LIMIT ?", (limit,)
-            ).fetchall()
+            rows = self._query(
+                "SELECT timestamp, name, value, metadata_json FROM metrics "
+                "ORDER BY id DESC LIMIT ?",
+                (limit,),
+            )
         return [
             {
                 "timestamp": r["timestamp"],
                 "name": r["name"],
                 "value": r["value"],
-                "metadata": json.loads(r["metadata_json"] or "{}"),
+                "metadata": orjson.loads(r["metadata_json"] or "{}"),
             }
             for r in rows
         ]
@@ -1,3 +1,4 @@
+import pytest
 from fastapi.testclient import TestClient
 
 from src.config import Config
@@ -6,19 +7,43 @@ from src.hash_chain import HashChainLog
 from src.services.intake import IntakeService
 
 
-def _build_node(node_id, tmp_path, monkeypatch):
-    monkeypatch.setenv("NODE_ID", node_id)
-    monkeypatch.setenv("PEER_NODES", "")
-    config = Config()
-    state = NodeState(config.node_id)
-    chain = HashChainLog(config.node_id, data_dir=str(tmp_path / f"{node_id}_logs"))
-    service = IntakeService(config, state, chain)
-    return TestClient(service.app)
+class _Node:
+    """An intake app built once; reset() swaps in empty state and chain."""
 
+    def __init__(self, node_id, data_dir):
+        self.node_id = node_id
+        self.data_dir = data_dir
+        self.service = IntakeService(
+            Config(), NodeState(node_id), HashChainLog(node_id, data_dir=data_dir)
+        )
+        self.client = TestClient(self.service.app)
 
-def test_two_nodes_merge_and_converge(tmp_path, monkeypatch):
-    node1 = _build_node("node-1", tmp_path, monkeypatch)
-    node2 = _build_node("node-2", tmp_path, monkeypatch)
+    def reset(self):
+        self.service.state = NodeState(self.node_id)
+        self.service.chain = HashChainLog(self.node_id, data_dir=self.data_dir)
+
+
+@pytest.fixture(scope="module")
+def nodes(tmp_path_factory):
+    base = tmp_path_factory.mktemp("nodes")
+    built = {}
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("PEER_NODES", "")
+        for node_id in ("node-1", "node-2"):
+            mp.setenv("NODE_ID", node_id)
+            built[node_id] = _Node(node_id, str(base / f"{node_id}_logs"))
+    return built
+
+
+@pytest.fixture
+def node_pair(nodes):
+    for node in nodes.values():
+        node.reset()
+    return nodes["node-1"].client, nodes["node-2"].client
+
+
+def test_two_nodes_merge_and_converge(node_pair):
+    node1, node2 = node_pair
 
     r1 = node1.post(
         "/event",
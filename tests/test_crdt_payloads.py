@@ -181,6 +181,34 @@ class TestORSet:
         s1.merge(s2)
         assert s1.value == {"highway_101", "bridge_north"}
 
+    def test_merge_does_not_share_tags_with_other(self):
+        s1 = ORSet("node-1")
+        s2 = ORSet("node-2")
+        s2.add("bridge_north")
+        s1.merge(s2)
+        s2.add("bridge_north")
+        assert len(s1.to_dict()["elements"]["bridge_north"]) == 1
+
+    def test_observed_remove_propagates_through_merge(self):
+        s1 = ORSet("node-1")
+        s2 = ORSet("node-2")
+        s1.add("highway_101")
+        s2.merge(s1)
+        s2.remove("highway_101")
+        s1.merge(s2)
+        assert not s1.lookup("highway_101")
+        assert "highway_101" not in s1.to_dict()["elements"]
+
+    def test_value_is_reused_until_the_set_changes(self):
+        s = ORSet("node-1")
+        s.add("highway_101")
+        first = s.value
+        assert s.value is first
+        s.add("bridge_north")
+        assert s.value == {"highway_101", "bridge_north"}
+        s.remove("highway_101")
+        assert s.value == {"bridge_north"}
+
     def test_to_dict_payload(self):
         s = ORSet("node-1", description="Active road_status hazards")
         s.add("highway_101")
@@ -325,6 +353,41 @@ class TestNodeStateGeneral:
         assert "event_count:water_level" in state.counters
         assert "general:bridge_north:water_level" in state.registers
 
+    def test_record_events_batch_matches_single_calls(self):
+        state = NodeState("node-1")
+        results = state.record_events(
+            [
+                (
+                    "e1",
+                    "water_level",
+                    {"value": 3.2, "location": "bridge_north"},
+                    "sensor",
+                ),
+                ("e2", "road_status", {"location": "highway_101"}, "infrastructure"),
+                (
+                    "e3",
+                    "road_status",
+                    {"location": "highway_101"},
+                    "infrastructure",
+                    "remove",
+                ),
+                ("e4", "water_level", {"value": 3.5, "location": "bridge_north"}),
+            ]
+        )
+        assert [r["category"] for r in results] == [
+            "sensor",
+            "infrastructure",
+            "infrastructure",
+            "general",
+        ]
+        assert state.version == 4
+        assert state.event_ids == ["e1", "e2", "e3", "e4"]
+        assert state.counters["event_count:water_level"].value == 2
+        assert not state.sets["hazards:road_status"].lookup("highway_101")
+        counters = [state.event_dots[eid][1] for eid in state.event_ids]
+        assert counters == sorted(set(counters))
+        assert state.version_vector() == {"node-1": counters[-1]}
+
 
 # ── NodeState — merge, merkle, serialization ────────────────────────
 
@@ -374,6 +437,65 @@ class TestNodeStateMerge:
         root2 = state.merkle_root()
         assert root1 != root2
 
+    def test_incremental_leaf_hashes_match_full_rebuild(self):
+        s1 = NodeState("node-1")
+        s2 = NodeState("node-2")
+        s1.record_event(
+            "e1",
+            "water_level",
+            {"value": 3.2, "location": "bridge_north"},
+            category="sensor",
+        )
+        s1.merkle_root()
+        s2.record_event(
+            "e2",
+            "road_status",
+            {"location": "highway_101"},
+            category="infrastructure",
+        )
+        s1.merge(s2)
+        s1.merkle_root()
+        s1.record_events(
+            [
+                (
+                    "e3",
+                    "shelter_occupancy",
+                    {"value": 5, "location": "shelter_east"},
+                    "resource",
+                ),
+                (
+                    "e4",
+                    "road_status",
+                    {"location": "highway_101"},
+                    "infrastructure",
+                    "remove",
+                ),
+            ]
+        )
+
+        rebuilt = NodeState.from_dict(s1.to_dict())
+        assert s1.subtree_keys("") == rebuilt.subtree_keys("")
+        assert s1.merkle_root() == rebuilt.merkle_root()
+
+    def test_root_updates_in_place_when_only_leaf_values_change(self):
+        state = NodeState("node-1")
+        for i, location in enumerate(["a", "b", "c", "d", "e"]):
+            state.record_event(
+                f"e{i}",
+                "water_level",
+                {"value": i, "location": location},
+                category="sensor",
+            )
+        first = state.merkle_root()
+        state.record_event(
+            "e9", "water_level", {"value": 9.9, "location": "c"}, category="sensor"
+        )
+
+        assert state.merkle_root() != first
+        assert state.merkle_root() == NodeState._combine_hashes(
+            list(state.subtree_keys("").values())
+        )
+
     def test_merged_states_converge(self):
         s1 = NodeState("node-1")
         s2 = NodeState("node-2")
@@ -442,6 +564,75 @@ class TestNodeStateSerialization:
         assert d["state_summary"]["sensor_readings"] == 1
         assert d["state_summary"]["total_events"] == 1
 
+    def test_merge_returns_new_root(self):
+        s1 = NodeState("node-1")
+        s2 = NodeState("node-2")
+        s2.record_event(
+            "e1",
+            "water_level",
+            {"value": 3.2, "location": "bridge_north"},
+            category="sensor",
+        )
+
+        root = s1.merge(s2)
+
+        assert root == s1.merkle_root() == s2.merkle_root()
+        assert s1.to_dict()["merkle_root"] == root
+
+    def test_to_dict_is_cached_until_mutation(self):
+        state = NodeState("node-1")
+        state.record_event(
+            "e1",
+            "water_level",
+            {"value": 3.2, "location": "bridge_north"},
+            category="sensor",
+        )
+        first = state.to_dict()
+        assert state.to_dict() is first
+
+        other = NodeState("node-2")
+        other.record_event(
+            "e2",
+            "water_level",
+            {"value": 1.0, "location": "bridge_south"},
+            category="sensor",
+        )
+        state.merge(other)
+
+        refreshed = state.to_dict()
+        assert refreshed is not first
+        assert refreshed["merkle_root"] == state.merkle_root()
+        assert refreshed["version"] == state.version
+        assert refreshed["state_summary"]["total_events"] == 2
+
+    def test_subtree_roots_follow_mutations(self):
+        state = NodeState("node-1")
+        state.record_event(
+            "e1",
+            "water_level",
+            {"value": 3.2, "location": "bridge_north"},
+            category="sensor",
+        )
+        before = state.subtree_roots()
+        assert state.subtree_root("") == state.merkle_root()
+
+        other = NodeState("node-2")
+        other.record_event(
+            "e2",
+            "shelter_occupancy",
+            {"value": 4, "location": "shelter_east"},
+            category="resource",
+            operation="increment",
+        )
+        state.merge(other)
+
+        after = state.subtree_roots()
+        assert after["r:"] == before["r:"]
+        assert after["pn:"] != before["pn:"]
+        assert after["pn:"] == state._combine_hashes(
+            list(state.subtree_keys("pn:").values())
+        )
+
 
 # ── Summary ─────────────────────────────────────────────────────────
 
@@ -481,3 +672,147 @@ class TestNodeStateSummary:
         assert summary["crdt_counts"]["g_counters"] == 4  # 4 event_count:* counters
         assert summary["crdt_counts"]["pn_counters"] == 1
         assert summary["crdt_counts"]["or_sets"] == 1
+
+    def test_summary_counts_sensor_readings_from_merge_and_round_trip(self):
+        s1 = NodeState("node-1")
+        s2 = NodeState("node-2")
+        s1.record_event(
+            "e1",
+            "water_level",
+            {"value": 3.2, "location": "bridge_north"},
+            category="sensor",
+        )
+        s2.record_event(
+            "e2",
+            "water_level",
+            {"value": 3.5, "location": "bridge_north"},
+            category="sensor",
+        )
+        s2.record_event(
+            "e3",
+            "temperature",
+            {"value": 28.5, "location": "bridge_north"},
+            category="sensor",
+        )
+        s1.merge(s2)
+        assert s1.summary()["sensor_readings"] == 2
+        assert NodeState.from_dict(s1.to_dict()).summary()["sensor_readings"] == 2
+
+
+# ── Delta state ─────────────────────────────────────────────────────
+
+
+class TestNodeStateDelta:
+    def test_delta_since_contains_only_newer_writes(self):
+        s1 = NodeState("node-1")
+        s1.record_event(
+            "e1",
+            "water_level",
+            {"value": 3.2, "location": "bridge_north"},
+            category="sensor",
+        )
+        seen = s1.version_vector()
+        s1.record_event(
+            "e2",
+            "shelter_occupancy",
+            {"value": 10, "location": "shelter_east"},
+            category="resource",
+        )
+
+        delta = s1.delta_since(seen)
+        assert delta["registers"] == {}
+        assert list(delta["pn_counters"]) == ["resource:shelter_east:shelter_occupancy"]
+        assert delta["event_ids"] == ["e2"]
+
+    def test_merge_delta_converges_with_full_merge(self):
+        s1 = NodeState("node-1")
+        s2 = NodeState("node-2")
+        s1.record_event(
+            "e1",
+            "water_level",
+            {"value": 3.2, "location": "bridge_north"},
+            category="sensor",
+        )
+        s2.merge(NodeState.from_dict(s1.to_dict()))
+        s1.record_event(
+            "e2",
+            "road_status",
+            {"value": "blocked", "location": "highway_101"},
+            category="infrastructure",
+        )
+
+        s2.merge_delta(s1.delta_since(s2.version_vector()))
+
+        assert s2.merkle_root() == s1.merkle_root()
+        assert s2.version_vector() == s1.version_vector()
+        assert s2.event_ids == ["e1", "e2"]
+
+    def test_restarted_node_writes_still_reach_peer_delta(self):
+        s1 = NodeState("node-1")
+        peer = NodeState("node-2")
+        s1.record_event(
+            "e1",
+            "water_level",
+            {"value": 3.2, "location": "bridge_north"},
+            category="sensor",
+        )
+        peer.merge(NodeState.from_dict(s1.to_dict()))
+
+        # same node id, empty in-memory state after a restart
+        restarted = NodeState("node-1")
+        restarted.record_event(
+            "e2",
+            "shelter_occupancy",
+            {"value": 10, "location": "shelter_east"},
+            category="resource",
+        )
+
+        delta = restarted.delta_since(peer.version_vector())
+        assert delta["event_ids"] == ["e2"]
+        assert list(delta["pn_counters"]) == ["resource:shelter_east:shelter_occupancy"]
+
+    def test_partial_repair_does_not_advance_version_vector(self):
+        b = NodeState("node-b")
+        b.record_event(
+            "e-old",
+            "water_level",
+            {"value": 1.0, "location": "y"},
+            category="sensor",
+        )
+        b.record_event(
+            "e-new",
+            "water_level",
+            {"value": 2.0, "location": "x"},
+            category="sensor",
+        )
+        s = NodeState("node-s")
+        s.merge(NodeState.from_dict(b.to_dict()))
+        p = NodeState("node-p")
+
+        p.merge_delta(s.delta_for_events(["e-new"]))
+
+        assert "e-new" in p.event_ids
+        assert p.version_vector() != s.version_vector()
+        p.merge_delta(s.delta_since(p.version_vector()))
+        assert "e-old" in p.event_ids
+        assert p.merkle_root() == s.merkle_root()
+
+    def test_leaves_dict_lists_only_events_on_those_leaves(self):
+        s1 = NodeState("node-1")
+        s1.record_event(
+            "e1",
+            "water_level",
+            {"value": 3.2, "location": "bridge_north"},
+            category="sensor",
+        )
+        s1.record_event(
+            "e2",
+            "shelter_occupancy",
+            {"value": 10, "location": "shelter_east"},
+            category="resource",
+        )
+
+        partial = s1.leaves_dict(["pn:resource:shelter_east:shelter_occupancy"])
+
+        assert partial["event_ids"] == ["e2"]
+        assert list(partial["event_dots"]) == ["e2"]
@@ -144,3 +144,29 @@ def test_create_node_returns_action_metadata(monkeypatch):
     assert result["url"].startswith("http://localhost:")
     assert "action_id" in result
     assert gateway.registered
+
+
+def test_create_node_skips_names_still_being_created(monkeypatch):
+    manager, _gateway = _build_manager(monkeypatch)
+    manager._pending_nodes.add("edge-node-3")
+
+    result = manager.create_node()
+    duplicate = manager.create_node("node-3")
+
+    assert result["node_id"] == "node-4"
+    assert "edge-node-3:9000" in result["peers"].split(",")
+    assert duplicate["status"] == "already_exists"
+    assert manager._pending_nodes == {"edge-node-3"}
+
+
+def test_get_node_tracks_isolation_changes(monkeypatch):
+    manager, _gateway = _build_manager(monkeypatch)
+
+    assert manager.get_node("edge-node-1")["node_id"] == "node-1"
+    assert manager.get_node("edge-node-9") is None
+
+    manager.isolate_node("node-1")
+    assert manager.get_node("edge-node-1")["isolated"] is True
+
+    manager.heal_node("node-1")
+    assert manager.get_node("edge-node-1")["isolated"] is False
@@ -1,8 +1,9 @@
 import asyncio
+import json
+from urllib.parse import urlencode
 
 from src.config import Config
 from src.crdt.state import NodeState
-from src.services import gateway as gateway_module
 from src.services.gateway import GatewayService
 
 
@@ -30,10 +31,12 @@ class FakeStore:
 
 
 class FakeResponse:
+    content_type = "application/json"
+
     def __init__(self, payload):
         self._payload = payload
 
-    async def json(self):
+    async def json(self, loads=None):
         return self._payload
 
 
@@ -63,7 +66,7 @@ class FakeClientSession:
     async def __aexit__(self, exc_type, exc, tb):
         return False
 
-    def get(self, url):
+    def get(self, url, headers=None):
         self.get_calls[url] = self.get_calls.get(url, 0) + 1
         response = self.responses[url]
         if isinstance(response, list):
@@ -99,6 +102,25 @@ def test_register_and_unregister_node(monkeypatch):
     assert "node-x" not in service.edge_nodes
 
 
+def test_get_status_reuses_node_map_until_registration_changes(monkeypatch):
+    monkeypatch.setenv("NODE_ID", "gateway-1")
+    monkeypatch.setenv("EDGE_NODES", "node-a:8001")
+    service = GatewayService(Config(), FakeStore())
+
+    first = service.get_status()["registered_nodes"]
+    assert first == {"node-a": "http://node-a:8001"}
+    assert service.get_status()["registered_nodes"] is first
+
+    service.register_node("node-x", "http://node-x:8001")
+    assert "node-x" in service.get_status()["registered_nodes"]
+
+    service.sync_nodes([{"node_id": "node-x", "url": "http://node-x:8001"}])
+    assert service.get_status()["registered_nodes"] == {"node-x": "http://node-x:8001"}
+
+    service.unregister_node("node-x")
+    assert service.get_status()["registered_nodes"] == {}
+
+
 def test_poll_once_detects_divergence_and_saves_snapshot(monkeypatch):
     monkeypatch.setenv("NODE_ID", "gateway-1")
     monkeypatch.setenv("EDGE_NODES", "node-a:8001,node-b:8002")
@@ -122,14 +144,10 @@ def test_poll_once_detects_divergence_and_saves_snapshot(monkeypatch):
         "http://node-b:8002/state": state_b.to_dict(),
     }
 
-    monkeypatch.setattr(
-        gateway_module.aiohttp,
-        "ClientSession",
-        lambda timeout=None: FakeClientSession(responses, timeout=timeout),
-    )
-
     store = FakeStore()
-    service = GatewayService(Config(), store)
+    service = GatewayService(
+        Config(), store, session_factory=lambda: FakeClientSession(responses)
+    )
     asyncio.run(service.poll_once())
 
     assert service.is_divergent is True
@@ -157,14 +175,10 @@ def test_poll_once_handles_unreachable_node(monkeypatch):
         "http://node-a:8001/state": state_a.to_dict(),
     }
 
-    monkeypatch.setattr(
-        gateway_module.aiohttp,
-        "ClientSession",
-        lambda timeout=None: FakeClientSession(responses, timeout=timeout),
-    )
-
     store = FakeStore()
-    service = GatewayService(Config(), store)
+    service = GatewayService(
+        Config(), store, session_factory=lambda: FakeClientSession(responses)
+    )
     asyncio.run(service.poll_once())
 
     assert service.is_divergent is False
@@ -192,14 +206,9 @@ def test_poll_once_retries_http_then_succeeds(monkeypatch):
     }
 
     fake_session = FakeClientSession(responses)
-    monkeypatch.setattr(
-        gateway_module.aiohttp,
-        "ClientSession",
-        lambda timeout=None: fake_session,
-    )
 
     store = FakeStore()
-    service = GatewayService(Config(), store)
+    service = GatewayService(Config(), store, session_factory=lambda: fake_session)
     asyncio.run(service.poll_once())
 
     assert service.runtime_metrics["http_retries"] == 1
@@ -222,16 +231,171 @@ def test_poll_once_skips_stale_state(monkeypatch):
         "http://node-a:8001/state": stale_state.to_dict(),
     }
 
-    monkeypatch.setattr(
-        gateway_module.aiohttp,
-        "ClientSession",
-        lambda timeout=None: FakeClientSession(responses, timeout=timeout),
-    )
-
     store = FakeStore()
-    service = GatewayService(Config(), store)
+    service = GatewayService(
+        Config(), store, session_factory=lambda: FakeClientSession(responses)
+    )
     service.edge_nodes["node-a"]["last_version"] = 5
     asyncio.run(service.poll_once())
 
     assert service.runtime_metrics["stale_state_skips"] == 1
     assert service.runtime_metrics["state_merges_successful"] == 0
+
+
+def test_poll_once_fetches_only_changed_leaves_after_first_sync(monkeypatch):
+    monkeypatch.setenv("NODE_ID", "gateway-1")
+    monkeypatch.setenv("EDGE_NODES", "node-a:8001")
+
+    state_a = _state_with_event(
+        "node-a", "evt-a", "water_level", 3.2, "bridge_north", "sensor"
+    )
+    responses = {
+        "http://node-a:8001/state/merkle": {"merkle_root": state_a.merkle_root()},
+        "http://node-a:8001/state": state_a.to_dict(),
+    }
+    fake_session = FakeClientSession(responses)
+
+    service = GatewayService(
+        Config(), FakeStore(), session_factory=lambda: fake_session
+    )
+    asyncio.run(service.poll_once())
+
+    # a new sensor reading only touches one counter and one register
+    state_a.record_event(
+        "evt-b",
+        "water_level",
+        {"value": 4.1, "location": "bridge_north"},
+        category="sensor",
+    )
+    changed = ["c:event_count:water_level", "r:sensor:bridge_north:water_level"]
+    responses.update(
+        {
+            "http://node-a:8001/state/merkle": {"merkle_root": state_a.merkle_root()},
+            "http://node-a:8001/state/subtree": {
+                "version": state_a.version,
+                "subtrees": state_a.subtree_roots(),
+            },
+            "http://node-a:8001/state/subtree/c:": {
+                "leaves": state_a.subtree_keys("c:")
+            },
+            "http://node-a:8001/state/subtree/r:": {
+                "leaves": state_a.subtree_keys("r:")
+            },
+            "http://node-a:8001/state/leaves?"
+            + urlencode([("keys", key) for key in changed]): state_a.leaves_dict(
+                changed
+            ),
+        }
+    )
+    asyncio.run(service.poll_once())
+
+    assert fake_session.get_calls["http://node-a:8001/state"] == 1
+    assert "http://node-a:8001/state/subtree/pn:" not in fake_session.get_calls
+    assert service.runtime_metrics["subtree_delta_fetches"] == 1
+    assert service.runtime_metrics["subtree_leaves_fetched"] == 2
+    assert service.merged_state.merkle_root() == state_a.merkle_root()
+
+
+def test_poll_once_reuses_one_session_across_polls(monkeypatch):
+    monkeypatch.setenv("NODE_ID", "gateway-1")
+    monkeypatch.setenv("EDGE_NODES", "node-a:8001")
+
+    state_a = _state_with_event(
+        "node-a", "evt-a", "water_level", 3.2, "bridge_north", "sensor"
+    )
+    responses = {
+        "http://node-a:8001/state/merkle": {"merkle_root": state_a.merkle_root()},
+        "http://node-a:8001/state": state_a.to_dict(),
+    }
+    sessions = []
+
+    def factory():
+        sessions.append(FakeClientSession(responses))
+        return sessions[-1]
+
+    service = GatewayService(Config(), FakeStore(), session_factory=factory)
+
+    async def poll_twice():
+        await service.poll_once()
+        await service.poll_once()
+
+    asyncio.run(poll_twice())
+
+    assert len(sessions) == 1
+    assert sessions[0].get_calls["http://node-a:8001/state/merkle"] == 2
+
+
+def test_poll_once_pulls_version_vector_delta_when_node_reports_vv(monkeypatch):
+    monkeypatch.setenv("NODE_ID", "gateway-1")
+    monkeypatch.setenv("EDGE_NODES", "node-a:8001")
+
+    state_a = _state_with_event(
+        "node-a", "evt-a", "water_level", 3.2, "bridge_north", "sensor"
+    )
+    first_vv = state_a.version_vector()
+    responses = {
+        "http://node-a:8001/state/merkle": {
+            "merkle_root": state_a.merkle_root(),
+            "vv": first_vv,
+        },
+        "http://node-a:8001/state": state_a.to_dict(),
+    }
+    fake_session = FakeClientSession(responses)
+    service = GatewayService(
+        Config(), FakeStore(), session_factory=lambda: fake_session
+    )
+    asyncio.run(service.poll_once())
+
+    state_a.record_event(
+        "evt-b",
+        "road_status",
+        {"location": "highway_101"},
+        category="infrastructure",
+    )
+    delta_url = "http://node-a:8001/state/delta?" + urlencode(
+        {"vv": json.dumps(first_vv, separators=(",", ":"))}
+    )
+    responses.update(
+        {
+            "http://node-a:8001/state/merkle": {
+                "merkle_root": state_a.merkle_root(),
+                "vv": state_a.version_vector(),
+            },
+            delta_url: state_a.delta_since(first_vv),
+        }
+    )
+    asyncio.run(service.poll_once())
+
+    assert fake_session.get_calls["http://node-a:8001/state"] == 1
+    assert "http://node-a:8001/state/subtree" not in fake_session.get_calls
+    assert service.runtime_metrics["state_delta_fetches"] == 1
+    assert service.edge_nodes["node-a"]["known_vv"] == state_a.version_vector()
+    assert service.merged_state.merkle_root() == state_a.merkle_root()
+
+
+def test_poll_once_skips_state_when_merkle_unchanged(monkeypatch):
+    monkeypatch.setenv("NODE_ID", "gateway-1")
+    monkeypatch.setenv("EDGE_NODES", "node-a:8001")
+
+    state_a = _state_with_event(
+        "node-a", "evt-a", "water_level", 3.2, "bridge_north", "sensor"
+    )
+    responses = {
+        "http://node-a:8001/state/merkle": {"merkle_root": state_a.merkle_root()},
+        "http://node-a:8001/state": state_a.to_dict(),
+    }
+    fake_session = FakeClientSession(responses)
+    store = FakeStore()
+    service = GatewayService(Config(), store, session_factory=lambda: fake_session)
+
+    async def poll_twice():
+        await service.poll_once()
+        await service.poll_once()
+
+    asyncio.run(poll_twice())
+
+    assert fake_session.get_calls["http://node-a:8001/state"] == 1
+    assert "http://node-a:8001/state/subtree" not in fake_session.get_calls
+    assert service.runtime_metrics["merkle_unchanged_skips"] == 1
+    assert service.runtime_metrics["polls_completed"] == 2
+    assert len(store.snapshots) == 2
@@ -1,6 +1,27 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from src.bloom import BloomFilter
 from src.config import Config
 from src.crdt.state import NodeState
-from src.services.gossip import GossipService
+from src.services import gossip as gossip_module
+from src.services.gossip import (
+    GossipService,
+    decode_message,
+    encode_digest,
+    encode_message,
+)
+
+
+class FakeTransport:
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data, addr):
+        self.sent.append((data, addr))
 
 
 def _build_gossip_service(monkeypatch, node_id="node-1"):
@@ -31,14 +52,17 @@ def test_state_sync_message_merges_remote_state(monkeypatch):
 
     service._handle(message)
 
-    assert service.stats["merged"] == 1
-    assert service.stats["last_merge_ms"] >= 0
-    assert service.stats["merge_time_ms_total"] >= 0
-    assert service.stats["last_successful_merge_at"] is not None
+    assert service.stats.merged == 1
+    assert service.stats.last_merge_ns >= 0
+    assert service.stats.merge_time_ns_total >= 0
+    assert service.stats.last_successful_merge_at_ns is not None
     assert "sensor:bridge_north:water_level" in service.state.registers
 
     full_stats = service.get_stats()
     assert full_stats["avg_merge_ms"] >= 0
+    assert full_stats["last_merge_ms"] >= 0
+    assert "last_merge_ns" not in full_stats
+    assert abs(full_stats["last_successful_merge_at"] - time.time()) < 60
 
 
 def test_own_state_sync_message_is_ignored(monkeypatch):
@@ -60,7 +84,7 @@ def test_own_state_sync_message_is_ignored(monkeypatch):
 
     service._handle(message)
 
-    assert service.stats["merged"] == 0
+    assert service.stats.merged == 0
     assert service.state.get_event_count() == 0
 
 
@@ -78,6 +102,397 @@ def test_merkle_only_message_does_not_mutate_state(monkeypatch):
 
     service._handle(message)
 
-    assert service.stats["merged"] == 0
-    assert service.stats["merkle_mismatches"] == 1
+    assert service.stats.merged == 0
+    assert service.stats.merkle_mismatches == 1
     assert service.state.merkle_root() == before_root
+
+
+def test_datagram_is_decoded_and_merged(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+
+    remote = NodeState("node-2")
+    remote.record_event(
+        "evt-1",
+        "water_level",
+        {"value": 3.2, "location": "bridge_north"},
+        category="sensor",
+    )
+    payload = encode_message(
+        {
+            "type": "state_sync",
+            "sender": "node-2",
+            "reason": "unit_test",
+            "state": remote.to_dict(),
+        }
+    )
+
+    service._on_datagram(payload, ("127.0.0.1", 9000))
+
+    assert service.stats.received == 1
+    assert service.stats.received_bytes == len(payload)
+    assert service.stats.last_message_type == "state_sync"
+    assert service.stats.merged == 1
+
+
+def test_legacy_json_datagram_is_still_accepted(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+
+    payload = json.dumps(
+        {"type": "merkle_only", "sender": "node-2", "merkle_root": "abc"}
+    ).encode()
+    service._on_datagram(payload, ("127.0.0.1", 9000))
+
+    assert service.stats.errors == 0
+    assert service.stats.last_message_type == "merkle_only"
+    assert service.stats.merkle_mismatches == 1
+
+
+def test_ack_switches_peer_to_delta_messages(monkeypatch):
+    monkeypatch.setenv("PEER_NODES", "node-2:9000")
+    monkeypatch.setenv("NODE_ID", "node-1")
+    service = GossipService(Config(), NodeState("node-1"))
+    service.state.record_event(
+        "evt-1",
+        "water_level",
+        {"value": 3.2, "location": "bridge_north"},
+        category="sensor",
+    )
+
+    message_type, _ = service._build_message("node-2:9000", {})
+    assert message_type == "state_sync"
+
+    service._handle(
+        {
+            "type": "ack",
+            "sender": "node-2",
+            "peer": "node-2:9000",
+            "vv": service.state.version_vector(),
+        }
+    )
+    service.state.record_event(
+        "evt-2",
+        "temperature",
+        {"value": 28.5, "location": "bridge_north"},
+        category="sensor",
+    )
+
+    message_type, msg = service._build_message("node-2:9000", {})
+    delta = decode_message(msg)["delta"]
+    assert message_type == "delta"
+    assert service.stats.acks_received == 1
+    assert delta["event_ids"] == ["evt-2"]
+    assert list(delta["registers"]) == ["sensor:bridge_north:temperature"]
+
+
+def test_full_state_body_is_encoded_once_per_tick(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+    shared = {}
+
+    _, first = service._build_message("node-2:9000", {}, shared)
+    _, second = service._build_message("node-3:9000", {}, shared)
+
+    assert list(shared) == [
+        "state_sync",
+        ("state_sync", "node-2:9000"),
+        ("state_sync", "node-3:9000"),
+    ]
+    assert decode_message(first)["to"] == "node-2:9000"
+    assert decode_message(second)["to"] == "node-3:9000"
+    assert decode_message(first)["state"] == decode_message(second)["state"]
+
+
+def test_shared_bodies_are_reused_until_state_changes(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+    service.config.peers = ["127.0.0.1:9002"]
+    service.config.gossip_interval = 0
+    service.transport = FakeTransport()
+    encoded = []
+    real_encode = gossip_module.encode_message
+
+    def counting_encode(message):
+        encoded.append(message["type"])
+        return real_encode(message)
+
+    monkeypatch.setattr(gossip_module, "encode_message", counting_encode)
+
+    async def run_ticks(count):
+        ticks = 0
+
+        async def fake_sleep(_):
+            nonlocal ticks
+            ticks += 1
+            service.running = ticks <= count
+
+        monkeypatch.setattr(gossip_module.asyncio, "sleep", fake_sleep)
+        service.running = True
+        await service._broadcast_loop()
+
+    asyncio.run(run_ticks(3))
+    assert encoded == ["state_sync"]
+    first, second, third = [data for data, _ in service.transport.sent]
+    assert first is second is third
+
+    service.state.record_event("e1", "water_level", {"value": 1.0})
+    asyncio.run(run_ticks(1))
+    assert encoded == ["state_sync", "state_sync"]
+    assert len(service.transport.sent) == 4
+
+
+def test_queued_state_messages_merge_as_one_batch(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+    service.transport = FakeTransport()
+
+    payloads = []
+    for node_id, location in (("node-2", "bridge_north"), ("node-3", "bridge_south")):
+        remote = NodeState(node_id)
+        remote.record_event(
+            f"evt-{node_id}",
+            "water_level",
+            {"value": 3.2, "location": location},
+            category="sensor",
+        )
+        payloads.append(
+            encode_message(
+                {
+                    "type": "state_sync",
+                    "sender": node_id,
+                    "to": "node-1:9000",
+                    "state": remote.to_dict(),
+                }
+            )
+        )
+
+    async def run():
+        service.running = True
+        service._merge_queue = asyncio.Queue()
+        for payload in payloads:
+            service._on_datagram(payload, ("127.0.0.1", 9000))
+        task = asyncio.create_task(service._merge_loop())
+        while service.stats.merge_batches == 0:
+            await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(run())
+
+    assert service.stats.merge_batches == 1
+    assert service.stats.merged == 1
+    assert service.stats.acks_sent == 2
+    assert sorted(service.state.event_ids) == ["evt-node-2", "evt-node-3"]
+
+
+def test_malformed_payload_does_not_drop_its_batch(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+    service.transport = FakeTransport()
+
+    remote = NodeState("node-2")
+    remote.record_event(
+        "evt-node-2",
+        "water_level",
+        {"value": 3.2, "location": "bridge_north"},
+        category="sensor",
+    )
+    messages = [
+        {"type": "state_sync", "sender": "node-3", "state": {"version": 1}},
+        {"type": "state_sync", "sender": "node-2", "state": remote.to_dict()},
+    ]
+    payloads = [encode_message({**m, "to": "node-1:9000"}) for m in messages]
+
+    async def run():
+        service.running = True
+        service._merge_queue = asyncio.Queue()
+        for payload in payloads:
+            service._on_datagram(payload, ("127.0.0.1", 9000))
+        task = asyncio.create_task(service._merge_loop())
+        while service.stats.merge_batches == 0:
+            await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(run())
+
+    assert service.stats.payloads_rejected == 1
+    assert service.stats.acks_sent == 1
+    assert service.state.event_ids == ["evt-node-2"]
+
+
+def test_peer_addresses_are_resolved_once_and_reused(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+    lookups = []
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        real_getaddrinfo = loop.getaddrinfo
+
+        async def counting_getaddrinfo(host, port, **kwargs):
+            lookups.append(host)
+            return await real_getaddrinfo(host, port, **kwargs)
+
+        monkeypatch.setattr(loop, "getaddrinfo", counting_getaddrinfo)
+        first = await service._peer_addr("localhost:9002")
+        second = await service._peer_addr("localhost:9002")
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == second == ("127.0.0.1", 9002)
+    assert lookups == ["localhost"]
+
+
+def test_merkle_mismatch_is_repaired_through_bloom_exchange(monkeypatch):
+    node_a = _build_gossip_service(monkeypatch, node_id="node-a")
+    node_b = _build_gossip_service(monkeypatch, node_id="node-b")
+    node_a.transport = FakeTransport()
+    node_b.transport = FakeTransport()
+
+    node_a.state.record_event("e1", "water_level", {"value": 1.0, "location": "x"})
+    node_b.state.merge(NodeState.from_dict(node_a.state.to_dict()))
+    node_a.state.record_event("e2", "water_level", {"value": 2.0, "location": "y"})
+
+    # a's full state was too large, so b only sees its digest
+    node_b._handle(
+        {
+            "type": "merkle_only",
+            "sender": "node-a",
+            "merkle_root": node_a.state.merkle_root(),
+        },
+        ("127.0.0.1", 9001),
+    )
+    bloom_msg, _ = node_b.transport.sent[-1]
+    assert decode_message(bloom_msg)["type"] == "merkle_bloom"
+
+    node_a._handle(decode_message(bloom_msg), ("127.0.0.1", 9002))
+    repair_msg, _ = node_a.transport.sent[-1]
+    repair = decode_message(repair_msg)
+    assert repair["type"] == "delta"
+    assert repair["delta"]["event_ids"] == ["e2"]
+
+    node_b._handle(repair, ("127.0.0.1", 9001))
+    assert node_b.state.merkle_root() == node_a.state.merkle_root()
+
+
+def test_bloom_false_positive_falls_back_to_full_delta(monkeypatch):
+    node_a = _build_gossip_service(monkeypatch, node_id="node-a")
+    node_b = _build_gossip_service(monkeypatch, node_id="node-b")
+    node_a.transport = FakeTransport()
+
+    node_a.state.record_event("e1", "water_level", {"value": 1.0, "location": "x"})
+    node_b.state.merge(NodeState.from_dict(node_a.state.to_dict()))
+    node_a.state.record_event("e2", "water_level", {"value": 2.0, "location": "y"})
+
+    # b lacks e2, but its filter claims it: a false positive
+    bloom = BloomFilter(2)
+    bloom.add("e1")
+    bloom.add("e2")
+    node_a._handle(
+        {
+            "type": "merkle_bloom",
+            "sender": "node-b",
+            "merkle_root": node_b.state.merkle_root(),
+            "bloom": bloom.to_dict(),
+        },
+        ("127.0.0.1", 9002),
+    )
+    repair_msg, _ = node_a.transport.sent[-1]
+    repair = decode_message(repair_msg)
+    assert repair["reason"] == "bloom_repair_full"
+
+    node_b._handle(repair, ("127.0.0.1", 9001))
+    assert node_b.state.merkle_root() == node_a.state.merkle_root()
+
+
+def test_implausible_bloom_filter_is_dropped(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-a")
+    service.transport = FakeTransport()
+    service.state.record_event("e1", "water_level", {"value": 1.0, "location": "x"})
+
+    for bloom in (
+        {"m": 8, "k": 1_000_000, "bits": b"\x00"},
+        {"m": 1 << 40, "k": 3, "bits": b"\x00"},
+        {"m": 8, "k": 3},
+        {"m": 8, "k": 1, "bits": 2 * 1024**3},
+    ):
+        service._handle(
+            {"type": "merkle_bloom", "sender": "node-b", "bloom": bloom},
+            ("127.0.0.1", 9002),
+        )
+
+    assert service.transport.sent == []
+    assert service.stats.payloads_rejected == 4
+
+
+def test_caught_up_peer_is_dampened_until_heartbeat(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+    service.config.gossip_interval = 1.0
+    service.state.record_event("e1", "water_level", {"value": 1.0})
+    peer = "127.0.0.1:9002"
+    service._peer_versions[peer] = service.state.version_vector()
+    our_vv = service.state.version_vector()
+
+    skipped = [
+        service._skip_peer(peer, float(tick), our_vv)
+        for tick in range(gossip_module.DAMPEN_TICKS + 1)
+    ]
+    assert skipped == [True] * gossip_module.DAMPEN_TICKS + [False]
+
+    service.state.record_event("e2", "water_level", {"value": 2.0})
+    assert not service._skip_peer(peer, 10.0, service.state.version_vector())
+
+
+def test_slow_peer_is_paced_by_ack_rtt(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+    service.config.gossip_interval = 1.0
+    peer = "127.0.0.1:9002"
+    service._peer_sent_at[peer] = 100.0
+    service._peer_rtt[peer] = 1.0
+
+    assert service._skip_peer(peer, 101.0, {})
+    assert not service._skip_peer(peer, 102.0, {})
+
+
+def test_oversized_state_falls_back_to_packed_digest(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+    service.state.record_event("e1", "water_level", {"value": 1.0})
+    monkeypatch.setattr(gossip_module, "MAX_PACKET", 64)
+
+    message_type, msg = service._build_message("node-2:9000", {})
+
+    assert message_type == "merkle_only"
+    assert msg == encode_digest("node-1", service.state.merkle_root(), 1)
+    assert len(msg) == 42 + len("node-1")
+    digest = decode_message(msg)
+    assert digest["sender"] == "node-1"
+    assert digest["merkle_root"] == service.state.merkle_root()
+    assert digest["event_count"] == 1
+
+
+def test_transport_errors_are_counted(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+    protocol = gossip_module._GossipProtocol(service)
+
+    protocol.error_received(ConnectionRefusedError("port unreachable"))
+
+    assert service.stats.errors == 1
+    assert service.stats.transport_errors == 1
+
+
+def test_digest_rejects_sender_ids_over_255_bytes():
+    root = "00" * 32
+    assert decode_message(encode_digest("é" * 127, root, 1))["sender"] == "é" * 127
+    with pytest.raises(ValueError):
+        encode_digest("é" * 200, root, 1)
+
+
+def test_oversized_state_is_compressed_before_digest_fallback(monkeypatch):
+    service = _build_gossip_service(monkeypatch, node_id="node-1")
+    for i in range(50):
+        service.state.record_event(
+            f"e{i}", "water_level", {"value": i, "location": f"bridge_{i}"}
+        )
+    _, plain = service._build_message("node-2:9000", {})
+    monkeypatch.setattr(gossip_module, "MAX_PACKET", len(plain) - 1)
+
+    message_type, msg = service._build_message("node-2:9000", {})
+
+    assert message_type == "state_sync"
+    assert msg[:1] == gossip_module.WIRE_ZLIB
+    assert len(msg) < len(plain)
+    assert decode_message(msg) == decode_message(plain)
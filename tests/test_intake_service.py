@@ -1,8 +1,12 @@
+import json
+
+import msgpack
 from fastapi.testclient import TestClient
 
 from src.config import Config
 from src.crdt.state import NodeState
 from src.hash_chain import HashChainLog
+from src.models import NodeStatus
 from src.services.intake import IntakeService
 
 
@@ -71,6 +75,30 @@ def test_event_resource_decrement_updates_pn_counter(tmp_path, monkeypatch):
     assert pn_value == 9
 
 
+def test_state_negotiates_msgpack_for_peers(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    client = TestClient(service.app)
+    client.post(
+        "/event",
+        json={"type": "water_level", "value": 2.5, "location": "bridge_north"},
+    )
+
+    as_json = client.get("/state")
+    as_msgpack = client.get("/state", headers={"Accept": "application/msgpack"})
+
+    assert as_json.headers["content-type"] == "application/json"
+    assert as_msgpack.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(as_msgpack.content, raw=False) == as_json.json()
+    assert len(as_msgpack.content) < len(as_json.content)
+
+    packed_delta = client.get("/state/delta", headers={"Accept": "application/msgpack"})
+    assert packed_delta.headers["content-type"] == "application/msgpack"
+    assert (
+        msgpack.unpackb(packed_delta.content, raw=False)
+        == client.get("/state/delta").json()
+    )
+
+
 def test_event_without_category_uses_general_default(tmp_path, monkeypatch):
     service = _build_service(tmp_path, monkeypatch)
     client = TestClient(service.app)
@@ -89,3 +117,110 @@ def test_event_without_category_uses_general_default(tmp_path, monkeypatch):
     assert body["category"] == "general"
     assert body["stored_in"]["counter_key"] == "event_count:temperature"
     assert body["stored_in"]["register_key"] == "general:bridge_north:temperature"
+
+
+def test_subtree_endpoints_localize_changed_leaves(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    client = TestClient(service.app)
+
+    client.post(
+        "/event",
+        json={
+            "type": "water_level",
+            "value": 3.2,
+            "location": "bridge_north",
+            "category": "sensor",
+            "metadata": {},
+        },
+    )
+
+    summary = client.get("/state/subtree").json()
+    assert summary["merkle_root"] == client.get("/state/merkle").json()["merkle_root"]
+    assert set(summary["subtrees"]) == {"c:", "r:", "pn:", "s:"}
+
+    registers = client.get("/state/subtree/r:").json()
+    assert list(registers["leaves"]) == ["r:sensor:bridge_north:water_level"]
+    assert registers["root"] == summary["subtrees"]["r:"]
+
+    partial = client.get(
+        "/state/leaves", params={"keys": ["r:sensor:bridge_north:water_level"]}
+    ).json()
+    assert list(partial["registers"]) == ["sensor:bridge_north:water_level"]
+    assert partial["counters"] == {}
+
+
+def test_state_delta_returns_writes_newer_than_vv(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    client = TestClient(service.app)
+    client.post(
+        "/event",
+        json={"type": "water_level", "value": 3.2, "location": "bridge_north"},
+    )
+    vv = client.get("/state/merkle").json()["vv"]
+    assert list(vv) == ["node-test"]
+
+    client.post(
+        "/event",
+        json={
+            "type": "road_status",
+            "value": "blocked",
+            "location": "highway_101",
+            "category": "infrastructure",
+        },
+    )
+    delta = client.get("/state/delta", params={"vv": json.dumps(vv)}).json()
+
+    assert list(delta["sets"]) == ["hazards:road_status"]
+    assert "general:bridge_north:water_level" not in delta["registers"]
+    assert client.get("/state/delta", params={"vv": "[1]"}).status_code == 400
+
+
+def test_status_matches_node_status_model(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    client = TestClient(service.app)
+    client.post(
+        "/event",
+        json={"type": "water_level", "value": 2.5, "location": "bridge_north"},
+    )
+
+    body = client.get("/status").json()
+
+    assert NodeStatus(**body).model_dump() == body
+    assert body["event_count"] == 1
+    assert body["merkle_root"] == service.state.merkle_root()
+
+
+def test_log_pages_with_cursor_and_streams_ndjson(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    client = TestClient(service.app)
+    for i in range(5):
+        client.post("/event", json={"type": "water_level", "value": i})
+
+    first = client.get("/log", params={"limit": 2})
+    assert first.json()["valid"] is True
+    assert [e["sequence"] for e in first.json()["entries"]] == [0, 1]
+    cursor = first.headers["X-Next-Cursor"]
+    assert cursor == "2"
+
+    streamed = client.get(
+        "/log",
+        params={"since": cursor, "limit": 10},
+        headers={"Accept": "application/x-ndjson"},
+    )
+    assert streamed.headers["content-type"] == "application/x-ndjson"
+    assert streamed.headers["X-Next-Cursor"] == "5"
+    assert streamed.headers["X-Chain-Valid"] == "true"
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert [e["sequence"] for e in lines] == [2, 3, 4]
+
+
+def test_hash_chain_blake2b_links_and_detects_tampering(tmp_path):
+    chain = HashChainLog("node-test", data_dir=str(tmp_path), algorithm="blake2b")
+    chain.append("e1", "water_level", {"value": 3.2})
+    chain.append("e2", "water_level", {"value": 3.5})
+
+    assert chain.verify()
+    assert len(chain.latest_hash()) == 64
+
+    chain.entries[0]["event_type"] = "temperature"
+    assert not chain.verify()
@@ -128,6 +128,42 @@ def test_bootstrap_events_convergence_success():
     assert len(result["verification_states"]) == 2
 
 
+def test_bootstrap_events_are_sent_concurrently():
+    docker_manager = FakeDockerManager(split_status="split_brain")
+    gateway = FakeGatewayService()
+    in_flight = 0
+    peak = 0
+
+    async def slow_sender(node_url, payload):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"ok": True, "status_code": 200, "body": {}}
+
+    result = asyncio.run(
+        run_bootstrap_events_convergence(
+            docker_manager=docker_manager,
+            gateway_service=gateway,
+            events_per_node=3,
+            verify_polls=1,
+            event_sender=slow_sender,
+        )
+    )
+
+    assert result["successful_events"] == 6
+    assert peak == 6
+    assert [entry["node_id"] for entry in result["send_results"]] == [
+        "node-1",
+        "node-1",
+        "node-1",
+        "node-2",
+        "node-2",
+        "node-2",
+    ]
+
+
 def test_bootstrap_events_convergence_handles_send_failures():
     docker_manager = FakeDockerManager(split_status="split_brain")
     gateway = FakeGatewayService()
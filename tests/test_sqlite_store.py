@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+import orjson
+
+from src.storage import SQLiteStore
+
+
+def _build_store(tmp_path, flush_interval=60.0):
+    # a long interval keeps the background writer idle, so tests decide
+    # when buffered rows reach the database
+    return SQLiteStore(str(tmp_path / "gateway.db"), flush_interval=flush_interval)
+
+
+def _count_rows(tmp_path, table):
+    conn = sqlite3.connect(str(tmp_path / "gateway.db"))
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_buffered_writes_are_visible_after_flush(tmp_path):
+    store = _build_store(tmp_path)
+    try:
+        store.save_metric("merge_time_ms", 1.5)
+        store.log_divergence(False, {"node-a": "abc"})
+        assert _count_rows(tmp_path, "metrics") == 0
+
+        store.flush()
+
+        assert _count_rows(tmp_path, "metrics") == 1
+        assert _count_rows(tmp_path, "divergence_log") == 1
+    finally:
+        store.close()
+
+
+def test_close_drains_pending_writes(tmp_path):
+    store = _build_store(tmp_path)
+    for value in range(3):
+        store.save_metric("node_count", value)
+    store.close()
+
+    reopened = _build_store(tmp_path)
+    try:
+        values = [m["value"] for m in reopened.get_metrics("node_count")]
+    finally:
+        reopened.close()
+    assert values == [2, 1, 0]
+
+
+def test_snapshot_round_trip(tmp_path):
+    store = _build_store(tmp_path)
+    try:
+        assert store.get_latest_snapshot() is None
+        state = {"node_id": "gateway", "registers": {"k": {"value": 3.2}}}
+        store.save_snapshot("root-1", 1, ["node-a"], {"node_id": "gateway"})
+        store.save_snapshot("root-2", 2, ["node-a", "node-b"], state)
+
+        latest = store.get_latest_snapshot()
+        history = list(store.get_snapshot_history(limit=5))
+    finally:
+        store.close()
+
+    assert latest["merkle_root"] == "root-2"
+    assert latest["node_count"] == 2
+    assert latest["source_nodes"] == ["node-a", "node-b"]
+    assert latest["state"] == state
+    assert [h["merkle_root"] for h in history] == ["root-2", "root-1"]
+    assert orjson.loads(history[0]["source_nodes"]) == ["node-a", "node-b"]
+
+
+def test_divergence_and_metric_round_trip(tmp_path):
+    store = _build_store(tmp_path)
+    try:
+        store.log_divergence(True, {"node-a": "abc", "node-b": "def"})
+        store.save_metric("is_divergent", 1, metadata={"nodes": 2})
+        store.save_metric("merge_time_ms", 4.25)
+
+        divergence = list(store.get_divergence_log(limit=5))
+        named = list(store.get_metrics("is_divergent"))
+        everything = list(store.get_metrics())
+    finally:
+        store.close()
+
+    assert divergence[0]["is_divergent"] is True
+    assert divergence[0]["merkle_roots"] == {"node-a": "abc", "node-b": "def"}
+    assert len(named) == 1
+    assert datetime.fromisoformat(named[0]["timestamp"])
+    assert named[0]["value"] == 1
+    assert named[0]["metadata"] == {"nodes": 2}
+    assert [m["name"] for m in everything] == ["merge_time_ms", "is_divergent"]
+    assert everything[0]["metadata"] == {}
+
+
+def test_partially_read_results_do_not_block_writes(tmp_path):
+    store = _build_store(tmp_path)
+    try:
+        store.save_metric("node_count", 1)
+        store.save_metric("node_count", 2)
+        rows = iter(store.get_metrics("node_count"))
+        next(rows)  # the caller stops early but keeps the result around
+
+        store.save_metric("node_count", 3)
+        writer = threading.Thread(target=store.flush)
+        writer.start()
+        writer.join(timeout=5)
+        assert not writer.is_alive()
+    finally:
+        store.close()
+
+
+def test_json_columns_are_stored_as_text(tmp_path):
+    store = _build_store(tmp_path)
+    store.save_snapshot("root-1", 1, ["node-a"], {"node_id": "gateway"})
+    store.log_divergence(False, {"node-a": "root-1"})
+    store.save_metric("node_count", 1, metadata={"poll": 1})
+    store.close()
+
+    conn = sqlite3.connect(str(tmp_path / "gateway.db"))
+    try:
+        types = conn.execute(
+            "SELECT typeof(source_nodes), typeof(state_json) FROM snapshots "
+            "UNION ALL SELECT typeof(merkle_roots_json), 'text' FROM divergence_log "
+            "UNION ALL SELECT typeof(metadata_json), 'text' FROM metrics"
+        ).fetchall()
+    finally:
+        conn.close()
+    assert types == [("text", "text")] * 3